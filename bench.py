@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline benchmark of the main.py pipeline:
+- Replaces Gemini with a local fake model (latency, jitter, response size)
+- Delivers to an in-process SMTP sink instead of Gmail
+- Runs the real pick_categories -> title -> article -> mail_post -> save path
+- Reports per-stage percentiles for each ARTICLES_PER_DAY x history size
+
+Usage: python bench.py --articles 2,10,25 --history 0,1000,10000
+       python bench.py --check
+"""
+
+import os
+import json
+import time
+import hashlib
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import socketserver
+from datetime import datetime, timedelta, timezone
+
+for _name in ("BLOGGER_SECRET_MAIL", "GMAIL_USER", "GMAIL_PASS", "GEMINI_API_KEY"):
+    os.environ.setdefault(_name, "bench@example.invalid")
+
+import main
+
+# ---------------- FAKE GEMINI ----------------
+class FakeUsage:
+    def __init__(self, prompt: str, text: str):
+        self.prompt_token_count = len(prompt) // 4
+        self.candidates_token_count = len(text) // 4
+        self.total_token_count = self.prompt_token_count + self.candidates_token_count
+
+class FakeChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+class FakeResponse:
+    def __init__(self, prompt: str, text: str, chunk_size: int = 0, chunk_delay: float = 0.0):
+        self.text = text
+        self.usage_metadata = FakeUsage(prompt, text)
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+
+    def __iter__(self):
+        for i in range(0, len(self.text), self.chunk_size):
+            time.sleep(self.chunk_delay)
+            yield FakeChunk(self.text[i:i + self.chunk_size])
+
+class FakeModel:
+    def __init__(self, fake, name: str, **kwargs):
+        self.fake = fake
+        self.name = name
+
+    def generate_content(self, prompt: str, stream: bool = False, **kwargs):
+        return self.fake.respond(prompt, stream)
+
+class FakeGenai:
+    """Stands in for the google.generativeai module returned by get_genai()."""
+
+    def __init__(self, latency: float, jitter: float, article_kb: float, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.article_kb = article_kb
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def GenerativeModel(self, name: str, **kwargs):
+        return FakeModel(self, name, **kwargs)
+
+    def _delay(self) -> float:
+        with self.lock:
+            self.calls += 1
+            return max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+
+    def _title(self) -> dict:
+        with self.lock:
+            n = self.rng.getrandbits(48)
+        return {"title": f"🔒 Guide pratique n°{n:x}", "meta": "Une méta description de test."}
+
+    def respond(self, prompt: str, stream: bool):
+        delay = self._delay()
+        if "candidates" in prompt and "une clé par numéro" in prompt:
+            count = prompt.count("\n- [")
+            text = json.dumps({str(i): [self._title() for _ in range(3)] for i in range(count)},
+                              ensure_ascii=False)
+        elif '"title"' in prompt:
+            text = json.dumps(self._title(), ensure_ascii=False)
+        else:
+            text = self._article()
+        if stream:
+            chunks = max(1, len(text) // 512)
+            return FakeResponse(prompt, text, 512, delay / chunks)
+        time.sleep(delay)
+        return FakeResponse(prompt, text)
+
+    def _article(self) -> str:
+        paragraph = "<p>Lorem ipsum <strong>dolor</strong> sit amet, consectetur adipiscing elit.</p>\n"
+        body = paragraph * max(1, int(self.article_kb * 1024 / len(paragraph)))
+        return ("```html\n<p>Introduction.</p>\n\n<h2>Première partie</h2>\n\n" + body +
+                "<h2>Conclusion</h2>\n\n<p>Abonnez-vous !</p>\n```")
+
+# ---------------- SMTP SINK ----------------
+class SmtpSinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str):
+        self.wfile.write((line + "\r\n").encode("ascii"))
+
+    def handle(self):
+        self.reply("220 bench-sink ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            verb = line.decode("utf-8", "replace").strip().split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self.reply("250-bench-sink")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif verb == "AUTH":
+                self.reply("235 2.7.0 Authentication successful")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b".\r\n", b".\n"):
+                        break
+                    size += len(data)
+                self.server.record(size)
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+class SmtpSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SmtpSinkHandler)
+        self.lock = threading.Lock()
+        self.messages = 0
+        self.bytes = 0
+
+    def record(self, size: int):
+        with self.lock:
+            self.messages += 1
+            self.bytes += size
+
+# ---------------- STAGE TIMING ----------------
+STAGES = {
+    "load": (main.JsonHistoryStore, "load"),
+    "pick": (main, "pick_categories"),
+    "title": (main, "gen_punchy_title_and_meta"),
+    "title_batch": (main, "gen_title_candidates"),
+    "article": (main, "gen_full_article_html"),
+    "mail": (main, "mail_post"),
+    "save": (main.JsonHistoryStore, "save"),
+}
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+        self.lock = threading.Lock()
+        self.originals = []
+
+    def wrap(self, stage: str, owner, attr: str):
+        original = getattr(owner, attr)
+        timer = self
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                with timer.lock:
+                    timer.samples.setdefault(stage, []).append(time.perf_counter() - start)
+
+        self.originals.append((owner, attr, original))
+        setattr(owner, attr, timed)
+
+    def install(self):
+        for stage, (owner, attr) in STAGES.items():
+            self.wrap(stage, owner, attr)
+
+    def uninstall(self):
+        for owner, attr, original in reversed(self.originals):
+            setattr(owner, attr, original)
+        self.originals = []
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[idx]
+
+# ---------------- SCENARIOS ----------------
+def seed_history(path: str, size: int):
+    # Writes a snapshot with `size` past posts spread over previous days.
+    history = main.JsonHistoryStore(path).load()
+    keys = main.get_catalog().keys
+    today = datetime.now(timezone.utc)
+    per_day = max(1, main.ARTICLES_PER_DAY)
+    for i in range(size):
+        cat = keys[i % len(keys)]
+        day = (today - timedelta(days=1 + i // per_day)).strftime("%Y-%m-%d")
+        main.record_post(history, cat, f"Titre historique n°{i}", history["category_loops"].get(cat, 0), day)
+    history["cat_index"] = size % len(keys)
+    history["cat_cursor"] = keys[history["cat_index"]]
+    main.apply_retention(history)
+    main.save_history(path, history)
+
+def run_scenario(articles: int, history_size: int, sink: SmtpSink) -> dict:
+    workdir = tempfile.mkdtemp(prefix="blogger-bench-")
+    try:
+        main.HISTORY_FILE = os.path.join(workdir, "blog_history.json")
+        main.HISTORY_DB = os.path.join(workdir, "blog_history.sqlite3")
+        main.OUTBOX_DIR = os.path.join(workdir, "outbox")
+        main.ARTICLES_PER_DAY = articles
+        seed_history(main.HISTORY_FILE, history_size)
+
+        timer = StageTimer()
+        timer.install()
+        sent_before = sink.messages
+        start = time.perf_counter()
+        try:
+            main.main()
+        finally:
+            timer.uninstall()
+        wall = time.perf_counter() - start
+        return {
+            "articles": articles,
+            "history": history_size,
+            "wall_s": wall,
+            "delivered": sink.messages - sent_before,
+            "stages": {
+                stage: {
+                    "n": len(values),
+                    "p50_ms": percentile(values, 50) * 1000,
+                    "p90_ms": percentile(values, 90) * 1000,
+                    "p99_ms": percentile(values, 99) * 1000,
+                    "max_ms": max(values) * 1000,
+                }
+                for stage, values in timer.samples.items()
+            },
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+# ---------------- CHECKS ----------------
+def legacy_snapshot(path: str, day: str):
+    # A history written before the catalog: category names as keys, titles
+    # as a list of SHA-1 hex digests, and neither cat_cursor nor last_posted.
+    names = [entry["name"] for entry in main.get_catalog().entries[:2]]
+    titles = [hashlib.sha1(f"ancien titre {i + 1}".encode("utf-8")).hexdigest() for i in range(2)]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"titles": titles, "days": {day: names},
+                   "cat_index": 2, "category_loops": {name: 1 for name in names},
+                   "recent_articles": {name: [f"Ancien titre {i + 1}"] for i, name in enumerate(names)}},
+                  f, ensure_ascii=False)
+
+def check_reruns(sink: SmtpSink) -> bool:
+    # Two runs in a row on a pre-catalog snapshot: the second one replays
+    # the first one's journal before the history is migrated.
+    workdir = tempfile.mkdtemp(prefix="blogger-check-")
+    try:
+        main.HISTORY_FILE = os.path.join(workdir, "blog_history.json")
+        main.OUTBOX_DIR = os.path.join(workdir, "outbox")
+        main.ARTICLES_PER_DAY = 2
+        yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%d")
+        legacy_snapshot(main.HISTORY_FILE, yesterday)
+        sent_before = sink.messages
+        try:
+            main.main()
+            main.main()
+        except Exception as e:
+            print(f"[CHECK] reruns on a pre-catalog history: {type(e).__name__}: {e} FAIL")
+            return False
+        history = main.JsonHistoryStore(main.HISTORY_FILE).load()
+        delivered = sink.messages - sent_before
+        recorded = sum(len(cats) for cats in history["days"].values())
+        dated = all(cat in history["last_posted"] for cats in history["days"].values() for cat in cats)
+        ok = delivered == 4 and recorded == 6 and dated
+        print(f"[CHECK] reruns on a pre-catalog history: delivered={delivered} recorded={recorded} "
+              f"last_posted={'ok' if dated else 'missing'} {'OK' if ok else 'FAIL'}")
+        return ok
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def check_round_robin() -> bool:
+    # With every cadence at 0 the due-day order is the old round-robin:
+    # consecutive catalog entries from the cursor, wrapping at the end.
+    keys = main.get_catalog().keys
+    cadence = main.SECTION_CADENCE, main.DEFAULT_CADENCE_DAYS
+    main.SECTION_CADENCE, main.DEFAULT_CADENCE_DAYS = {}, 0
+    try:
+        days = len(keys) // 2 + 5
+        history = {"cat_cursor": keys[5], "days": {}, "last_posted": {}}
+        picked = [cat for _, cats in main.preview_schedule(history, days, 2) for cat in cats]
+    finally:
+        main.SECTION_CADENCE, main.DEFAULT_CADENCE_DAYS = cadence
+    expected = [keys[(5 + i) % len(keys)] for i in range(2 * days)]
+    ok = picked == expected
+    print(f"[CHECK] round-robin with cadence 0 over {days} days: {'OK' if ok else 'FAIL'}")
+    return ok
+
+def print_report(result: dict):
+    print(f"\n== ARTICLES_PER_DAY={result['articles']} history={result['history']} "
+          f"wall={result['wall_s']:.2f}s delivered={result['delivered']} ==")
+    print(f"{'stage':<12}{'n':>5}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for stage in STAGES:
+        row = result["stages"].get(stage)
+        if row:
+            print(f"{stage:<12}{row['n']:>5}{row['p50_ms']:>10.1f}{row['p90_ms']:>10.1f}"
+                  f"{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}")
+
+def int_list(text: str) -> list:
+    return [int(x) for x in text.split(",") if x.strip()]
+
+def main_bench(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark of the Blogger pipeline")
+    parser.add_argument("--articles", type=int_list, default=[2, 10])
+    parser.add_argument("--history", type=int_list, default=[0, 1000])
+    parser.add_argument("--latency", type=float, default=0.2, help="fake Gemini latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="uniform jitter (s)")
+    parser.add_argument("--article-kb", type=float, default=8.0, help="fake article size (KiB)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the results to this file")
+    parser.add_argument("--check", action="store_true",
+                        help="run the regression checks instead of the benchmark")
+    args = parser.parse_args(argv)
+
+    main._genai = FakeGenai(args.latency, args.jitter, args.article_kb, args.seed)
+    sink = SmtpSink()
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+    main.SMTP_POOL = main.SmtpPool("127.0.0.1", sink.server_address[1], "bench", "bench",
+                                   main.SMTP_POOL_SIZE, use_ssl=False)
+    main.HISTORY_BACKEND = "json"
+
+    results = []
+    try:
+        if args.check:
+            if not all([check_reruns(sink), check_round_robin()]):
+                raise SystemExit(1)
+            return
+        for history_size in args.history:
+            for articles in args.articles:
+                result = run_scenario(articles, history_size, sink)
+                print_report(result)
+                results.append(result)
+    finally:
+        main.SMTP_POOL.close()
+        sink.shutdown()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main_bench()
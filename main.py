@@ -2,854 +2,349 @@
 # -*- coding: utf-8 -*-
 """
 Daily Blogger feeder with history:
-- Picks 2 categories per UTC day sequentially
+- Picks 2 categories per UTC day sequentially from categories.txt
 - Avoids repeating categories within the same day
 - Loops back to top when reaching the end
 - Generates unique titles, meta descriptions, and articles
 - Avoids repeating content used in last 7 articles per category
-- Tracks history in .data/blog_history.json
+- Tracks history in .data/blog_history.json (+ an append-only .journal)
+- Spools each generated article to .data/outbox until it is delivered
 - Emails each article to Blogger
+- Generates and emails the day's categories concurrently (MAX_CONCURRENCY)
+- Records Gemini token usage per day and fits each run into its token, cost and time budgets
+- Serves several blogs from one process with --blogs FILE (see blogs.example.json)
+- pregenerate [N] fills a backlog of the next N days so run only mails
+- daemon stays up and runs DAEMON_SCHEDULE (UTC slots) with warm clients
+
+Usage: python main.py [--timing] [--profile [DIR]] [--blogs FILE]
+       [run | pregenerate [N] | daemon | dry-run | stats | preview [N]]
 """
 
+import time
+_STARTED = time.perf_counter()
+
 import os
-import ssl
-import smtplib
+import argparse
 import json
 import hashlib
-from datetime import datetime, timezone
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-
-import google.generativeai as genai
+import sqlite3
+import re
+import base64
+import random
+import struct
+import unicodedata
+import threading
+import functools
+import contextlib
+import contextvars
+import bisect
+import atexit
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from html import escape as html_escape, unescape as html_unescape
 
 # ---------------- CONFIG ----------------
-BLOGGER_MAIL = os.environ["BLOGGER_SECRET_MAIL"]
-GMAIL_USER   = os.environ["GMAIL_USER"]
-GMAIL_PASS   = os.environ["GMAIL_PASS"]
+# Secrets are read and the Gemini SDK imported only by the commands that
+# need them (see require_env / get_genai), so stats, preview or a plain
+# import work without credentials. Each blog's destination address is read
+# through Blog.mail (BLOGGER_SECRET_MAIL unless the blog names another).
+SECRET_VARS = ("GMAIL_USER", "GMAIL_PASS", "GEMINI_API_KEY")
+
+def require_env(name: str) -> str:
+    value = os.environ.get(name)
+    if not value:
+        raise RuntimeError(f"Variable d'environnement manquante: {name}")
+    return value
+
+_genai = None
+_genai_lock = threading.Lock()
+
+def get_genai():
+    global _genai
+    with _genai_lock:
+        if _genai is None:
+            import google.generativeai as genai
+            genai.configure(api_key=require_env("GEMINI_API_KEY"))
+            _genai = genai
+    return _genai
+
+_models = {}
+
+def get_model():
+    # One GenerativeModel per SDK module and model name, shared by every
+    # call, thread and (in the daemon) run.
+    genai = get_genai()
+    key = (id(genai), MODEL)
+    with _genai_lock:
+        if key not in _models:
+            _models[key] = genai.GenerativeModel(MODEL)
+        return _models[key]
 
-genai.configure(api_key=os.environ["GEMINI_API_KEY"]) 
 MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
 HISTORY_FILE = os.getenv("HISTORY_FILE", ".data/blog_history.json")
+HISTORY_BACKEND = os.getenv("HISTORY_BACKEND", "json")  # json | sqlite
+HISTORY_DB = os.getenv("HISTORY_DB", ".data/blog_history.sqlite3")
+HISTORY_COMPACT_EVERY = int(os.getenv("HISTORY_COMPACT_EVERY", "200"))
+HISTORY_RETENTION_DAYS = int(os.getenv("HISTORY_RETENTION_DAYS", "90"))
+NEAR_DUP_MAX_TITLES = int(os.getenv("NEAR_DUP_MAX_TITLES", "5000"))
 ARTICLES_PER_DAY = int(os.getenv("ARTICLES_PER_DAY", "2"))
 MAX_RETRIES_TITLE = int(os.getenv("MAX_RETRIES_TITLE", "5"))
-
-# ---------------- CATEGORIES (UPDATED FROM USER) ----------------
-CATEGORIES = [
-    "SÉCURITÉ INFORMATIQUE ET PROTECTION DES DONNÉES - Comment protéger un compte Facebook contre le piratage",
-    "SÉCURITÉ INFORMATIQUE ET PROTECTION DES DONNÉES - Reconnaître et éviter les fausses pages Facebook (phishing)",
-    "SÉCURITÉ INFORMATIQUE ET PROTECTION DES DONNÉES - Comment sécuriser un compte Instagram avec l’authentification à deux facteurs",
-    "SÉCURITÉ INFORMATIQUE ET PROTECTION DES DONNÉES - Identifier un email frauduleux et éviter les arnaques en ligne",
-    "SÉCURITÉ INFORMATIQUE ET PROTECTION DES DONNÉES - Vérifier si un lien est sûr avant de cliquer",
-    "SÉCURITÉ INFORMATIQUE ET PROTECTION DES DONNÉES - Comment chiffrer ses messages avec Signal ou WhatsApp",
-    "SÉCURITÉ INFORMATIQUE ET PROTECTION DES DONNÉES - Activer la vérification en deux étapes sur Gmail",
-    "SÉCURITÉ INFORMATIQUE ET PROTECTION DES DONNÉES - Bloquer la publicité intrusive sur son smartphone",
-    "SÉCURITÉ INFORMATIQUE ET PROTECTION DES DONNÉES - Sauvegarder ses données pour éviter les pertes",
-    "SÉCURITÉ INFORMATIQUE ET PROTECTION DES DONNÉES - Protéger ses photos avec un mot de passe sur iOS et Android",
-    "SÉCURITÉ INFORMATIQUE ET PROTECTION DES DONNÉES - Éviter les virus en naviguant sur Internet",
-    "SÉCURITÉ INFORMATIQUE ET PROTECTION DES DONNÉES - Sécuriser un réseau Wi-Fi domestique",
-    "SÉCURITÉ INFORMATIQUE ET PROTECTION DES DONNÉES - Reconnaître un site frauduleux (.onion et dark web)",
-    "SÉCURITÉ INFORMATIQUE ET PROTECTION DES DONNÉES - Supprimer un virus de son PC avec Windows Defender",
-    "SÉCURITÉ INFORMATIQUE ET PROTECTION DES DONNÉES - Sécuriser sa clé USB contre les infections",
-    "SÉCURITÉ INFORMATIQUE ET PROTECTION DES DONNÉES - Comment repérer un compte WhatsApp frauduleux",
-    "SÉCURITÉ INFORMATIQUE ET PROTECTION DES DONNÉES - Supprimer un logiciel malveillant de son téléphone",
-    "SÉCURITÉ INFORMATIQUE ET PROTECTION DES DONNÉES - Comment détecter un malware sur Android",
-    "SÉCURITÉ INFORMATIQUE ET PROTECTION DES DONNÉES - Gérer ses mots de passe avec un gestionnaire sécurisé",
-    "SÉCURITÉ INFORMATIQUE ET PROTECTION DES DONNÉES - Comment éviter le vol d’identité en ligne",
-
-    "ASTUCES ET PRODUCTIVITÉ - Créer un dossier invisible sur Windows",
-    "ASTUCES ET PRODUCTIVITÉ - Créer un dossier sans nom sur PC",
-    "ASTUCES ET PRODUCTIVITÉ - Rouvrir un onglet fermé dans Chrome ou Firefox",
-    "ASTUCES ET PRODUCTIVITÉ - Télécharger des vidéos YouTube légalement avec YouTube Premium",
-    "ASTUCES ET PRODUCTIVITÉ - Utiliser Google Drive pour stocker ses fichiers gratuitement",
-    "ASTUCES ET PRODUCTIVITÉ - Accéder à son PC depuis un smartphone Android",
-    "ASTUCES ET PRODUCTIVITÉ - Convertir un fichier PDF en Word gratuitement",
-    "ASTUCES ET PRODUCTIVITÉ - Masquer un fichier sur Android sans application",
-    "ASTUCES ET PRODUCTIVITÉ - Compresser des images sans perte de qualité",
-    "ASTUCES ET PRODUCTIVITÉ - Créer une adresse email temporaire",
-    "ASTUCES ET PRODUCTIVITÉ - Télécharger ses photos iCloud sur PC",
-    "ASTUCES ET PRODUCTIVITÉ - Convertir une page web en fichier PDF",
-    "ASTUCES ET PRODUCTIVITÉ - Utiliser Google Keep pour prendre des notes rapides",
-    "ASTUCES ET PRODUCTIVITÉ - Avoir ses notifications Android sur PC",
-    "ASTUCES ET PRODUCTIVITÉ - Traduire instantanément un texte avec Google Lens",
-    "ASTUCES ET PRODUCTIVITÉ - Scanner un document avec son smartphone",
-    "ASTUCES ET PRODUCTIVITÉ - Partager un gros fichier sans email",
-    "ASTUCES ET PRODUCTIVITÉ - Faire une capture d’écran défilante sur Android",
-    "ASTUCES ET PRODUCTIVITÉ - Utiliser un VPN pour protéger sa connexion",
-    "ASTUCES ET PRODUCTIVITÉ - Trouver l’emplacement où une photo a été prise",
-
-    "MAINTENANCE ET DÉPANNAGE - Réparer une clé USB corrompue",
-    "MAINTENANCE ET DÉPANNAGE - Supprimer un virus raccourci sur clé USB",
-    "MAINTENANCE ET DÉPANNAGE - Retrouver des photos supprimées sur Android",
-    "MAINTENANCE ET DÉPANNAGE - Sauvegarder un message WhatsApp important",
-    "MAINTENANCE ET DÉPANNAGE - Accélérer son PC sous Windows",
-    "MAINTENANCE ET DÉPANNAGE - Libérer de l’espace sur son smartphone",
-    "MAINTENANCE ET DÉPANNAGE - Désactiver les notifications intrusives sur Chrome",
-    "MAINTENANCE ET DÉPANNAGE - Réinitialiser un téléphone Android bloqué (méthode officielle)",
-    "MAINTENANCE ET DÉPANNAGE - Mettre à jour Windows sans perdre ses fichiers",
-    "MAINTENANCE ET DÉPANNAGE - Utiliser Hiren’s BootCD pour dépanner un PC",
-    "MAINTENANCE ET DÉPANNAGE - Vérifier la santé d’un disque dur",
-    "MAINTENANCE ET DÉPANNAGE - Changer le mot de passe Windows oublié (méthode légale)",
-    "MAINTENANCE ET DÉPANNAGE - Supprimer un logiciel qui refuse de se désinstaller",
-    "MAINTENANCE ET DÉPANNAGE - Récupérer ses données après un formatage",
-    "MAINTENANCE ET DÉPANNAGE - Améliorer la vitesse de chargement de son smartphone",
-    "MAINTENANCE ET DÉPANNAGE - Optimiser la batterie d’un téléphone Android",
-    "MAINTENANCE ET DÉPANNAGE - Réparer un fichier corrompu",
-    "MAINTENANCE ET DÉPANNAGE - Utiliser un antivirus gratuit efficace",
-    "MAINTENANCE ET DÉPANNAGE - Sauvegarder automatiquement ses fichiers importants",
-    "MAINTENANCE ET DÉPANNAGE - Réparer une connexion Internet lente",
-
-    "PROGRAMMATION ET DÉVELOPPEMENT - Apprendre les bases du langage HTML",
-    "PROGRAMMATION ET DÉVELOPPEMENT - Créer une page web simple avec HTML et CSS",
-    "PROGRAMMATION ET DÉVELOPPEMENT - Comprendre le JavaScript en 10 minutes",
-    "PROGRAMMATION ET DÉVELOPPEMENT - Apprendre à créer un script Python de base",
-    "PROGRAMMATION ET DÉVELOPPEMENT - Faire une calculatrice simple en Python",
-    "PROGRAMMATION ET DÉVELOPPEMENT - Développer un formulaire de contact en HTML/PHP",
-    "PROGRAMMATION ET DÉVELOPPEMENT - Créer un bouton animé en CSS",
-    "PROGRAMMATION ET DÉVELOPPEMENT - Comprendre l’algorithme",
-    "PROGRAMMATION ET DÉVELOPPEMENT - Utiliser ChatGPT pour générer du code",
-    "PROGRAMMATION ET DÉVELOPPEMENT - Introduction aux bases de données MySQL",
-    "PROGRAMMATION ET DÉVELOPPEMENT - Créer un mini-jeu avec Scratch",
-    "PROGRAMMATION ET DÉVELOPPEMENT - Faire un script qui renomme plusieurs fichiers automatiquement",
-    "PROGRAMMATION ET DÉVELOPPEMENT - Apprendre à utiliser Git et GitHub",
-    "PROGRAMMATION ET DÉVELOPPEMENT - Créer un générateur de mot de passe sécurisé en Python",
-    "PROGRAMMATION ET DÉVELOPPEMENT - Afficher l’heure et la date en JavaScript",
-    "PROGRAMMATION ET DÉVELOPPEMENT - Créer une page responsive avec Bootstrap",
-    "PROGRAMMATION ET DÉVELOPPEMENT - Faire un bot Telegram simple en Python",
-    "PROGRAMMATION ET DÉVELOPPEMENT - Comprendre les API et comment les utiliser",
-    "PROGRAMMATION ET DÉVELOPPEMENT - Envoyer un email automatiquement avec Python",
-    "PROGRAMMATION ET DÉVELOPPEMENT - Créer un convertisseur d’unités en JavaScript",
-
-    "CLOUD, STOCKAGE ET SYNCHRONISATION - Sauvegarder automatiquement ses photos sur Google Photos",
-    "CLOUD, STOCKAGE ET SYNCHRONISATION - Utiliser Dropbox pour partager un fichier",
-    "CLOUD, STOCKAGE ET SYNCHRONISATION - Obtenir 15 Go gratuits sur Google Drive",
-    "CLOUD, STOCKAGE ET SYNCHRONISATION - Organiser ses fichiers sur OneDrive",
-    "CLOUD, STOCKAGE ET SYNCHRONISATION - Synchroniser ses documents entre PC et smartphone",
-    "CLOUD, STOCKAGE ET SYNCHRONISATION - Sauvegarder un site web pour le consulter hors ligne",
-    "CLOUD, STOCKAGE ET SYNCHRONISATION - Utiliser iCloud pour sauvegarder ses données iPhone",
-    "CLOUD, STOCKAGE ET SYNCHRONISATION - Compresser des fichiers avant de les envoyer par email",
-    "CLOUD, STOCKAGE ET SYNCHRONISATION - Utiliser WeTransfer pour envoyer des fichiers volumineux",
-    "CLOUD, STOCKAGE ET SYNCHRONISATION - Partager un dossier complet sur Google Drive",
-
-    "ANDROID ET IOS – ASTUCES - Installer une application Android en APK de manière sécurisée",
-    "ANDROID ET IOS – ASTUCES - Supprimer le cache d’une application sur Android",
-    "ANDROID ET IOS – ASTUCES - Créer un dossier d’applications sur l’écran d’accueil iOS",
-    "ANDROID ET IOS – ASTUCES - Utiliser Siri pour automatiser une action",
-    "ANDROID ET IOS – ASTUCES - Faire un enregistrement d’écran sur iPhone",
-    "ANDROID ET IOS – ASTUCES - Programmer l’envoi d’un SMS sur Android",
-    "ANDROID ET IOS – ASTUCES - Utiliser le mode économie d’énergie sur iOS",
-    "ANDROID ET IOS – ASTUCES - Mettre à jour manuellement Android",
-    "ANDROID ET IOS – ASTUCES - Retrouver un iPhone perdu avec Localiser mon iPhone",
-    "ANDROID ET IOS – ASTUCES - Cloner l’écran de son téléphone sur une TV",
-    "ANDROID ET IOS – ASTUCES - Désactiver les applications en arrière-plan pour économiser la batterie",
-    "ANDROID ET IOS – ASTUCES - Utiliser Google Assistant efficacement",
-    "ANDROID ET IOS – ASTUCES - Libérer de l’espace sur iPhone sans supprimer de photos",
-    "ANDROID ET IOS – ASTUCES - Activer le mode sombre sur Android et iOS",
-    "ANDROID ET IOS – ASTUCES - Installer une police personnalisée sur Android",
-    "ANDROID ET IOS – ASTUCES - Gérer les autorisations d’application sur Android",
-    "ANDROID ET IOS – ASTUCES - Transférer ses données d’iPhone vers Android",
-    "ANDROID ET IOS – ASTUCES - Scanner un QR Code sans application",
-    "ANDROID ET IOS – ASTUCES - Retrouver les applications récemment supprimées",
-    "ANDROID ET IOS – ASTUCES - Empêcher une application d’utiliser vos données mobiles",
-
-    "BUREAUTIQUE ET OUTILS - Créer un tableau Excel avec formules simples",
-    "BUREAUTIQUE ET OUTILS - Utiliser Word pour créer un CV",
-    "BUREAUTIQUE ET OUTILS - Faire une présentation PowerPoint dynamique",
-    "BUREAUTIQUE ET OUTILS - Convertir un fichier Word en PDF",
-    "BUREAUTIQUE ET OUTILS - Ajouter un graphique dans Excel",
-    "BUREAUTIQUE ET OUTILS - Utiliser Google Docs pour travailler en ligne",
-    "BUREAUTIQUE ET OUTILS - Mettre un mot de passe sur un fichier Word",
-    "BUREAUTIQUE ET OUTILS - Faire un publipostage dans Word",
-    "BUREAUTIQUE ET OUTILS - Traduire un document Word automatiquement",
-    "BUREAUTIQUE ET OUTILS - Créer un planning dans Google Sheets",
-    "BUREAUTIQUE ET OUTILS - Fusionner deux PDF gratuitement",
-    "BUREAUTIQUE ET OUTILS - Extraire des images d’un PDF",
-    "BUREAUTIQUE ET OUTILS - Créer un formulaire Google Forms",
-    "BUREAUTIQUE ET OUTILS - Compresser un PDF pour réduire sa taille",
-    "BUREAUTIQUE ET OUTILS - Supprimer les doublons dans Excel",
-    "BUREAUTIQUE ET OUTILS - Utiliser les macros dans Excel",
-    "BUREAUTIQUE ET OUTILS - Insérer une vidéo dans PowerPoint",
-    "BUREAUTIQUE ET OUTILS - Partager un document Word pour travailler à plusieurs",
-    "BUREAUTIQUE ET OUTILS - Convertir un PowerPoint en vidéo",
-    "BUREAUTIQUE ET OUTILS - Ajouter des commentaires dans un document Word",
-
-    "CRÉATION DE CONTENU ET MULTIMÉDIA - Monter une vidéo avec CapCut",
-    "CRÉATION DE CONTENU ET MULTIMÉDIA - Créer une miniature YouTube avec Canva",
-    "CRÉATION DE CONTENU ET MULTIMÉDIA - Enregistrer sa voix sur PC",
-    "CRÉATION DE CONTENU ET MULTIMÉDIA - Faire un podcast depuis son téléphone",
-    "CRÉATION DE CONTENU ET MULTIMÉDIA - Ajouter des sous-titres à une vidéo",
-    "CRÉATION DE CONTENU ET MULTIMÉDIA - Utiliser OBS Studio pour filmer son écran",
-    "CRÉATION DE CONTENU ET MULTIMÉDIA - Créer un diaporama photo avec musique",
-    "CRÉATION DE CONTENU ET MULTIMÉDIA - Retoucher une image avec Photopea (gratuit)",
-    "CRÉATION DE CONTENU ET MULTIMÉDIA - Créer un GIF animé à partir d’une vidéo",
-    "CRÉATION DE CONTENU ET MULTIMÉDIA - Enregistrer une réunion Zoom",
-    "CRÉATION DE CONTENU ET MULTIMÉDIA - Optimiser une vidéo pour TikTok",
-    "CRÉATION DE CONTENU ET MULTIMÉDIA - Couper un extrait d’une vidéo",
-    "CRÉATION DE CONTENU ET MULTIMÉDIA - Ajouter un filigrane à une image",
-    "CRÉATION DE CONTENU ET MULTIMÉDIA - Créer un logo gratuitement en ligne",
-    "CRÉATION DE CONTENU ET MULTIMÉDIA - Enregistrer une vidéo en slow motion",
-    "CRÉATION DE CONTENU ET MULTIMÉDIA - Supprimer l’arrière-plan d’une photo",
-    "CRÉATION DE CONTENU ET MULTIMÉDIA - Créer un collage photo sur mobile",
-    "CRÉATION DE CONTENU ET MULTIMÉDIA - Utiliser InShot pour éditer des vidéos",
-    "CRÉATION DE CONTENU ET MULTIMÉDIA - Faire un montage audio simple",
-    "CRÉATION DE CONTENU ET MULTIMÉDIA - Créer une bannière pour un réseau social",
-
-    "INTERNET ET NAVIGATION - Activer le mode lecteur dans un navigateur",
-    "INTERNET ET NAVIGATION - Utiliser les favoris pour retrouver un site rapidement",
-    "INTERNET ET NAVIGATION - Rechercher efficacement sur Google",
-    "INTERNET ET NAVIGATION - Sauvegarder les mots de passe dans Chrome",
-    "INTERNET ET NAVIGATION - Activer la traduction automatique dans Chrome",
-    "INTERNET ET NAVIGATION - Installer une extension sur Firefox",
-    "INTERNET ET NAVIGATION - Utiliser le mode navigation privée",
-    "INTERNET ET NAVIGATION - Gérer plusieurs onglets facilement",
-    "INTERNET ET NAVIGATION - Bloquer les cookies publicitaires",
-    "INTERNET ET NAVIGATION - Télécharger une page web en PDF",
-    "INTERNET ET NAVIGATION - Vérifier la vitesse de sa connexion Internet",
-    "INTERNET ET NAVIGATION - Rechercher une image sur Google à partir d’une photo",
-    "INTERNET ET NAVIGATION - Utiliser un bloqueur de pop-up",
-    "INTERNET ET NAVIGATION - Créer un raccourci vers un site web sur le bureau",
-    "INTERNET ET NAVIGATION - Utiliser Google Alerts pour surveiller un sujet",
-    "INTERNET ET NAVIGATION - Consulter l’historique d’un site avec Wayback Machine",
-    "INTERNET ET NAVIGATION - Sauvegarder ses favoris pour les importer ailleurs",
-    "INTERNET ET NAVIGATION - Ouvrir automatiquement plusieurs onglets au démarrage",
-    "INTERNET ET NAVIGATION - Utiliser un outil de capture d’écran web",
-    "INTERNET ET NAVIGATION - Consulter les statistiques d’un site web",
-
-    "CYBERSÉCURITÉ AVANCÉE - Comprendre le chiffrement AES",
-    "CYBERSÉCURITÉ AVANCÉE - Créer un mot de passe fort et mémorisable",
-    "CYBERSÉCURITÉ AVANCÉE - Activer un pare-feu sur Windows et macOS",
-    "CYBERSÉCURITÉ AVANCÉE - Détecter une tentative de phishing par SMS",
-    "CYBERSÉCURITÉ AVANCÉE - Utiliser l’authentification biométrique",
-    "CYBERSÉCURITÉ AVANCÉE - Sauvegarder ses données sur un disque externe sécurisé",
-    "CYBERSÉCURITÉ AVANCÉE - Protéger un fichier ZIP par mot de passe",
-    "CYBERSÉCURITÉ AVANCÉE - Apprendre les bases du RGPD",
-    "CYBERSÉCURITÉ AVANCÉE - Sécuriser ses comptes avec Authy",
-    "CYBERSÉCURITÉ AVANCÉE - Comprendre les ransomwares et comment s’en protéger",
-    "CYBERSÉCURITÉ AVANCÉE - Mettre à jour ses logiciels pour éviter les failles",
-    "CYBERSÉCURITÉ AVANCÉE - Utiliser un antivirus gratuit fiable",
-    "CYBERSÉCURITÉ AVANCÉE - Chiffrer un disque dur externe",
-    "CYBERSÉCURITÉ AVANCÉE - Protéger sa webcam contre le piratage",
-    "CYBERSÉCURITÉ AVANCÉE - Vérifier si ses données ont fuité avec HaveIBeenPwned",
-    "CYBERSÉCURITÉ AVANCÉE - Configurer la sécurité sur LinkedIn",
-    "CYBERSÉCURITÉ AVANCÉE - Supprimer ses anciennes publications sensibles",
-    "CYBERSÉCURITÉ AVANCÉE - Éviter les réseaux Wi-Fi publics non sécurisés",
-    "CYBERSÉCURITÉ AVANCÉE - Gérer les permissions d’une application mobile",
-    "CYBERSÉCURITÉ AVANCÉE - Reconnaître une fausse application sur le Play Store",
-
-    "TECHNOLOGIE ET PROJETS DIY - Créer un serveur Minecraft privé",
-    "TECHNOLOGIE ET PROJETS DIY - Installer une imprimante sur un réseau Wi-Fi",
-    "TECHNOLOGIE ET PROJETS DIY - Fabriquer un support de téléphone maison",
-    "TECHNOLOGIE ET PROJETS DIY - Utiliser une Raspberry Pi comme mini-ordinateur",
-    "TECHNOLOGIE ET PROJETS DIY - Créer une horloge connectée avec Arduino",
-    "TECHNOLOGIE ET PROJETS DIY - Faire une lampe LED pilotée par smartphone",
-    "TECHNOLOGIE ET PROJETS DIY - Transformer un vieux PC en serveur de fichiers",
-    "TECHNOLOGIE ET PROJETS DIY - Configurer une caméra de sécurité IP",
-    "TECHNOLOGIE ET PROJETS DIY - Construire un système d’arrosage automatique avec Arduino",
-    "TECHNOLOGIE ET PROJETS DIY - Installer un système domotique simple",
-    "TECHNOLOGIE ET PROJETS DIY - Connecter une manette de jeu à son téléphone",
-    "TECHNOLOGIE ET PROJETS DIY - Faire une borne d’arcade maison",
-    "TECHNOLOGIE ET PROJECTS DIY - Transformer un écran de PC en TV",
-    "TECHNOLOGIE ET PROJETS DIY - Construire un haut-parleur Bluetooth maison",
-    "TECHNOLOGIE ET PROJETS DIY - Installer un détecteur de mouvement connecté",
-    "TECHNOLOGIE ET PROJETS DIY - Utiliser un capteur de température connecté",
-    "TECHNOLOGIE ET PROJETS DIY - Monter un PC de A à Z",
-    "TECHNOLOGIE ET PROJETS DIY - Optimiser un vieux PC pour qu’il soit plus rapide",
-    "TECHNOLOGIE ET PROJETS DIY - Créer un NAS avec un Raspberry Pi",
-    "TECHNOLOGIE ET PROJETS DIY - Installer un assistant vocal open source",
-
-    "OUTILS ET SERVICES EN LIGNE - Créer un sondage avec Strawpoll",
-    "OUTILS ET SERVICES EN LIGNE - Convertir un fichier audio en texte",
-    "OUTILS ET SERVICES EN LIGNE - Faire un test de vitesse Internet avec Speedtest",
-    "OUTILS ET SERVICES EN LIGNE - Retirer un arrière-plan d’image gratuitement",
-    "OUTILS ET SERVICES EN LIGNE - Redimensionner une image en ligne",
-    "OUTILS ET SERVICES EN LIGNE - Convertir une vidéo en MP3 légalement",
-    "OUTILS ET SERVICES EN LIGNE - Créer un QR Code personnalisé",
-    "OUTILS ET SERVICES EN LIGNE - Utiliser un planificateur de publications sur réseaux sociaux",
-    "OUTILS ET SERVICES EN LIGNE - Faire une capture d’écran longue sur mobile",
-    "OUTILS ET SERVICES EN LIGNE - Créer une signature électronique",
-    "OUTILS ET SERVICES EN LIGNE - Utiliser Trello pour gérer ses projets",
-    "OUTILS ET SERVICES EN LIGNE - Créer un organigramme en ligne",
-    "OUTILS ET SERVICES EN LIGNE - Éditer un fichier PDF directement dans le navigateur",
-    "OUTILS ET SERVICES EN LIGNE - Vérifier l’orthographe d’un texte automatiquement",
-    "OUTILS ET SERVICES EN LIGNE - Créer un calendrier partagé en ligne",
-    "OUTILS ET SERVICES EN LIGNE - Sauvegarder ses mots de passe sur un coffre-fort en ligne",
-    "OUTILS ET SERVICES EN LIGNE - Utiliser Google Trends pour analyser un sujet",
-    "OUTILS ET SERVICES EN LIGNE - Créer un lien court avec Bitly",
-    "OUTILS ET SERVICES EN LIGNE - Générer une infographie en ligne",
-    "OUTILS ET SERVICES EN LIGNE - Organiser un événement avec Eventbrite",
-
-    "FORMATION ET APPRENTISSAGE - Apprendre à taper plus vite au clavier",
-    "FORMATION ET APPRENTISSAGE - Comprendre les bases du référencement SEO",
-    "FORMATION ET APPRENTISSAGE - Apprendre les notions de base du marketing digital",
-    "FORMATION ET APPRENTISSAGE - Lire un livre gratuitement sur Internet Archive",
-    "FORMATION ET APPRENTISSAGE - Suivre un cours gratuit sur OpenClassrooms",
-    "FORMATION ET APPRENTISSAGE - Apprendre l’anglais avec Duolingo",
-    "FORMATION ET APPRENTISSAGE - Apprendre les mathématiques avec Khan Academy",
-    "FORMATION ET APPRENTISSAGE - Découvrir les bases de la finance personnelle",
-    "FORMATION ET APPRENTISSAGE - Apprendre la retouche photo gratuitement",
-    "FORMATION ET APPRENTISSAGE - Comprendre les bases de la cybersécurité",
-    "FORMATION ET APPRENTISSAGE - Apprendre à utiliser Canva pour le design",
-    "FORMATION ET APPRENTISSAGE - Suivre une formation gratuite sur Coursera",
-    "FORMATION ET APPRENTISSAGE - Apprendre la gestion de projet",
-    "FORMATION ET APPRENTISSAGE - Comprendre le fonctionnement de la blockchain",
-    "FORMATION ET APPRENTISSAGE - Apprendre les bases du montage vidéo",
-    "FORMATION ET APPRENTISSAGE - Apprendre à coder en Java",
-    "FORMATION ET APPRENTISSAGE - Apprendre les bases de Linux",
-    "FORMATION ET APPRENTISSAGE - Apprendre à configurer un serveur web",
-    "FORMATION ET APPRENTISSAGE - Comprendre le fonctionnement du cloud computing",
-    "FORMATION ET APPRENTISSAGE - Suivre une formation sur la protection des données",
-
-    "HACKING ÉTHIQUE & SÉCURITÉ - Comment scanner un site avec Nikto",
-    "HACKING ÉTHETIQUE & SÉCURITÉ - Exploitation d’une faille LFI pas à pas",
-    "HACKING ÉTHIQUE & SÉCURITÉ - Utiliser Hydra pour brute-forcer un compte FTP",
-    "HACKING ÉTHIQUE & SÉCURITÉ - Apprendre à faire un phishing Facebook avec SocialFish",
-    "HACKING ÉETHIQUE & SÉCURITÉ - Utiliser la commande whois pour obtenir des infos d’un domaine",
-    "HACKING ÉTHIQUE & SÉCURITÉ - Récupérer les en-têtes HTTP avec Curl",
-    "HACKING ÉTHIQUE & SÉCURITÉ - Simuler un DDoS sur un serveur local avec LOIC",
-    "HACKING ÉTHIQUE & SÉCURITÉ - Bypasser un pare-feu avec proxychains",
-    "HACKING ÉETHIQUE & SÉCURITÉ - Utiliser John The Ripper pour cracker un mot de passe Linux",
-    "HACKING ÉETHIQUE & SÉCURITÉ - Exploiter une injection XML (XXE)",
-
-    "PROGRAMMATION & SCRIPTS DE SÉCURITÉ - Créer un script Python pour vérifier si un site est en ligne",
-    "PROGRAMMATION & SCRIPTS DE SÉCURITÉ - Automatiser la sauvegarde d’un site avec Python et FTP",
-    "PROGRAMMATION & SCRIPTS DE SÉCURITÉ - Script pour trouver les sous-domaines d’un site",
-    "PROGRAMMATION & SCRIPTS DE SÉCURITÉ - Automatiser un scan de ports avec Python",
-    "PROGRAMMATION & SCRIPTS DE SÉCURITÉ - Détecter une adresse IP publique via Python",
-    "PROGRAMMATION & SCRIPTS DE SÉCURITÉ - Créer un keylogger en Python (usage éthique uniquement)",
-    "PROGRAMMATION & SCRIPTS DE SÉCURITÉ - Générer des mots de passe forts en Python",
-    "PROGRAMMATION & SCRIPTS DE SÉCURITÉ - Script pour envoyer un email anonyme en Python",
-    "PROGRAMMATION & SCRIPTS DE SÉCURITÉ - Extraire les liens d’une page web avec BeautifulSoup",
-    "PROGRAMMATION & SCRIPTS DE SÉCURITÉ - Convertir un script Python en exécutable Windows",
-
-    "OSINT (OPEN SOURCE INTELLIGENCE) - Trouver l’adresse IP d’un site avec nslookup",
-    "OSINT (OPEN SOURCE INTELLIGENCE) - Utiliser theHarvester pour collecter des emails",
-    "OSINT (OPEN SOURCE INTELLIGENCE) - Analyse de profil Facebook avec Sherlock",
-    "OSINT (OPEN SOURCE INTELLIGENCE) - Rechercher un pseudo sur le dark web",
-    "OSINT (OPEN SOURCE INTELLIGENCE) - Retrouver les anciennes versions d’un site avec Wayback Machine",
-    "OSINT (OPEN SOURCE INTELLIGENCE) - Trouver l’emplacement approximatif d’une IP",
-    "OSINT (OPEN SOURCE INTELLIGENCE) - Recherche d’images inversée avec Google Lens",
-    "OSINT (OPEN SOURCE INTELLIGENCE) - Suivre un compte Twitter avec Twint",
-    "OSINT (OPEN SOURCE INTELLIGENCE) - Identifier un hébergeur de site web",
-    "OSINT (OPEN SOURCE INTELLIGENCE) - Utiliser Maltego pour cartographier des données",
-
-    "PENTESTING RÉSEAU - Analyse de paquets avec Wireshark",
-    "PENTESTING RÉSEAU - Créer un faux point Wi-Fi avec Airbase-ng",
-    "PENTESTING RÉSEAU - Capter les mots de passe sur un réseau non sécurisé",
-    "PENTESTING RÉSEAU - Cracker un mot de passe WPA avec aircrack-ng",
-    "PENTESTING RÉSEAU - Détecter les appareils connectés à un réseau",
-    "PENTESTING RÉSEAU - Exploiter une vulnérabilité SMB avec Metasploit",
-    "PENTESTING RÉSEAU - Simuler une attaque MITM (Man in the Middle)",
-    "PENTESTING RÉSEAU - Bloquer l’accès internet à un appareil précis",
-    "PENTESTING RÉSEAU - Faire un scan réseau avec Nmap",
-    "PENTESTING RÉSEAU - Utiliser ARP Spoofing pour intercepter du trafic",
-
-    "SÉCURITÉ WEB & BYPASS - Tester un site pour vulnérabilités XSS",
-    "SÉCURITÉ WEB & BYPASS - Bypasser un login avec SQL Injection basique",
-    "SÉCURITÉ WEB & BYPASS - Extraire des données via SQLMap",
-    "SÉCURITÉ WEB & BYPASS - Upload malveillant et exécution PHP",
-    "SÉCURITÉ WEB & BYPASS - Trouver des pages cachées d’un site avec Dirb",
-    "SÉCURITÉ WEB & BYPASS - Détecter la version d’un CMS et ses failles",
-    "SÉCURITÉ WEB & BYPASS - Exploiter une faille CSRF",
-    "SÉCURITÉ WEB & BYPASS - Contourner Cloudflare pour obtenir IP réelle",
-    "SÉCURITÉ WEB & BYPASS - Forcer le téléchargement d’un fichier protégé",
-    "SÉCURITÉ WEB & BYPASS - Créer un script d’auto-login sur un site web",
-
-    "SÉCURITÉ MOBILE & ANDROID - Rooter un téléphone Android (sécurité)",
-    "SÉCURITÉ MOBILE & ANDROID - Extraire les données d’une application Android",
-    "SÉCURITÉ MOBILE & ANDROID - Analyser les permissions d’une APK",
-    "SÉCURITÉ MOBILE & ANDROID - Désassembler une APK avec JADX",
-    "SÉCURITÉ MOBILE & ANDROID - Faire un sniffing réseau sur Android",
-    "SÉCURITÉ MOBILE & ANDROID - Utiliser Termux pour lancer des scripts Python",
-    "SÉCURITÉ MOBILE & ANDROID - Cloner une application Android",
-    "SÉCURITÉ MOBILE & ANDROID - Installer Metasploit sur Android",
-    "SÉCURITÉ MOBILE & ANDROID - Capter les SMS sur un appareil rooté",
-    "SÉCURITÉ MOBILE & ANDROID - Supprimer un mot de passe d’écran sur Android (éthique)",
-
-    "DARK WEB & ANONYMAT - Installer Tor sur PC et Android",
-    "DARK WEB & ANONYMAT - Accéder à des .onion avec Tor Browser",
-    "DARK WEB & ANONYMAT - Créer un serveur caché sur Tor",
-    "DARK WEB & ANONYMAT - Utiliser Tails OS pour rester anonyme",
-    "DARK WEB & ANONYMAT - Configurer un VPN sur routeur",
-    "DARK WEB & ANONYMAT - Échanger des fichiers de manière chiffrée",
-    "DARK WEB & ANONYMAT - Utiliser PGP pour chiffrer des messages",
-    "DARK WEB & ANONYMAT - Masquer son IP avec un réseau proxy",
-    "DARK WEB & ANONYMAT - Acheter en crypto de manière anonyme",
-    "DARK WEB & ANONYMAT - Éviter le tracking sur les réseaux sociaux",
-
-    "CYBERDÉFENSE & PRÉVENTION - Mettre en place un IDS avec Snort",
-    "CYBERDÉFENSE & PRÉVENTION - Sauvegarder et chiffrer ses données avec VeraCrypt",
-    "CYBERDÉFENSE & PRÉVENTION - Sécuriser son serveur Linux",
-    "CYBERDÉFENSE & PRÉVENTION - Configurer un pare-feu sous Windows",
-    "CYBERDÉFENSE & PRÉVENTION - Protéger ses comptes avec authentification à deux facteurs",
-    "CYBERDÉFENSE & PRÉVENTION - Détecter un logiciel espion sur PC",
-    "CYBERDÉFENSE & PRÉVENTION - Éviter les ransomwares",
-    "CYBERDÉFENSE & PRÉVENTION - Nettoyer les métadonnées d’un fichier",
-    "CYBERDÉFENSE & PRÉVENTION - Utiliser un gestionnaire de mots de passe sécurisé",
-    "CYBERDÉFENSE & PRÉVENTION - Vérifier si ses données ont fuité (HaveIBeenPwned)",
-
-    "HACKING ÉTHIQUE AVANCÉ - Exploiter une faille RCE (Remote Code Execution)",
-    "HACKING ÉTHIQUE AVANCÉ - Chainer plusieurs failles pour un accès total",
-    "HACKING ÉTHIQUE AVANCÉ - Analyse d’un malware inconnu",
-    "HACKING ÉTHIQUE AVANCÉ - Évasion d’un antivirus",
-    "HACKING ÉTHIQUE AVANCÉ - Exploiter une faille sur un IoT (caméra connectée)",
-    "HACKING ÉTHIQUE AVANCÉ - Utiliser Burp Suite pour intercepter du trafic",
-    "HACKING ÉTHIQUE AVANCÉ - Forger des requêtes HTTP manuelles",
-    "HACKING ÉTHIQUE AVANCÉ - Énumération d’utilisateurs sur un site web",
-    "HACKING ÉTHIQUE AVANCÉ - Exploitation d’une faille SSRF",
-    "HACKING ÉTHIQUE AVANCÉ - Créer un backdoor Python chiffré",
-
-    "DIVERS & AUTOMATISATION - Automatiser le téléchargement de fichiers via Python",
-    "DIVERS & AUTOMATISATION - Scraper des résultats Google sans API",
-    "DIVERS & AUTOMATISATION - Créer un bot Telegram pour envoyer des alertes",
-    "DIVERS & AUTOMATISATION - Faire parler un bot avec IA locale",
-    "DIVERS & AUTOMATISATION - Créer un ransomware éducatif en Python",
-    "DIVERS & AUTOMATISATION - Automatiser le scan de plusieurs IP avec Nmap",
-    "DIVERS & AUTOMATISATION - Script pour détecter un site down et envoyer une alerte",
-    "DIVERS & AUTOMATISATION - Envoyer des messages programmés sur WhatsApp",
-    "DIVERS & AUTOMATISATION - Créer un bot qui répond aux emails automatiquement",
-    "DIVERS & AUTOMATISATION - Simuler un environnement Windows infecté pour formation",
-
-        # DARK WEB & ANONYMAT
-    "DARK WEB & ANONYMAT - Masquer son IP avec un réseau proxy",
-    "DARK WEB & ANONYMAT - Vérifier son anonymat en ligne",
-    "DARK WEB & ANONYMAT - Sécuriser sa messagerie sur le Dark Web",
-    "DARK WEB & ANONYMAT - Configurer I2P pour la navigation anonyme",
-    "DARK WEB & ANONYMAT - Créer un portefeuille crypto anonyme",
-    "DARK WEB & ANONYMAT - Utiliser un bridge Tor pour contourner la censure",
-    "DARK WEB & ANONYMAT - Héberger un blog anonyme",
-    "DARK WEB & ANONYMAT - Différences entre Tor, I2P et Freenet",
-    "DARK WEB & ANONYMAT - Accéder à des forums cachés en toute sécurité",
-    "DARK WEB & ANONYMAT - Utiliser Whonix comme système d’exploitation anonyme",
-    "DARK WEB & ANONYMAT - Naviguer sur le Dark Web en toute sécurité",
-    "DARK WEB & ANONYMAT - Créer un compte anonyme sur un forum .onion",
-    "DARK WEB & ANONYMAT - Les marketplaces légales sur le Dark Web",
-    "DARK WEB & ANONYMAT - Sécuriser un disque externe pour Dark Web",
-    "DARK WEB & ANONYMAT - Éviter les arnaques sur le Dark Web",
-    "DARK WEB & ANONYMAT - Installer un bridge Tor pour contournement avancé",
-    "DARK WEB & ANONYMAT - Comprendre les cookies et trackers cachés",
-    "DARK WEB & ANONYMAT - Utiliser des VM pour surf anonymisé",
-    "DARK WEB & ANONYMAT - Sauvegarder les clés PGP en sécurité",
-    "DARK WEB & ANONYMAT - Éviter les fuites de métadonnées",
-    
-    # SYSTÈMES D’EXPLOITATION
-    "SYSTÈMES D’EXPLOITATION - Installer Linux Ubuntu pas à pas",
-    "SYSTÈMES D’EXPLOITATION - Créer une clé USB bootable",
-    "SYSTÈMES D’EXPLOITATION - Partitionner un disque dur",
-    "SYSTÈMES D’EXPLOITATION - Installer Windows 11",
-    "SYSTÈMES D’EXPLOITATION - Découvrir les commandes Linux de base",
-    "SYSTÈMES D’EXPLOITATION - Gérer les utilisateurs sous Linux",
-    "SYSTÈMES D’EXPLOITATION - Mettre à jour son OS en toute sécurité",
-    "SYSTÈMES D’EXPLOITATION - Installer un dual boot Windows/Linux",
-    "SYSTÈMES D’EXPLOITATION - Sauvegarder son système avec Clonezilla",
-    "SYSTÈMES D’EXPLOITATION - Utiliser une machine virtuelle avec VirtualBox",
-    "SYSTÈMES D’EXPLOITATION - Configurer un firewall Linux",
-    "SYSTÈMES D’EXPLOITATION - Installer des drivers sous Linux",
-    "SYSTÈMES D’EXPLOITATION - Optimiser Windows 11 pour gaming",
-    "SYSTÈMES D’EXPLOITATION - Configurer SSH pour administration distante",
-    "SYSTÈMES D’EXPLOITATION - Utiliser rsync pour sauvegarde automatique",
-    "SYSTÈMES D’EXPLOITATION - Gérer les paquets avec apt et yum",
-    "SYSTÈMES D’EXPLOITATION - Sécuriser un serveur web",
-    "SYSTÈMES D’EXPLOITATION - Créer des scripts bash automatisés",
-    "SYSTÈMES D’EXPLOITATION - Utiliser cron pour tâches planifiées",
-    "SYSTÈMES D’EXPLOITATION - Résoudre les problèmes de démarrage Linux",
-
-    # INTELLIGENCE ARTIFICIELLE
-    "INTELLIGENCE ARTIFICIELLE - Comprendre le fonctionnement du Machine Learning",
-    "INTELLIGENCE ARTIFICIELLE - Créer un chatbot avec Python",
-    "INTELLIGENCE ARTIFICIELLE - Utiliser une API d’IA pour générer du texte",
-    "INTELLIGENCE ARTIFICIELLE - Découvrir la vision par ordinateur",
-    "INTELLIGENCE ARTIFICIELLE - Créer un modèle de reconnaissance d’images",
-    "INTELLIGENCE ARTIFICIELLE - Automatiser des tâches avec l’IA",
-    "INTELLIGENCE ARTIFICIELLE - Comprendre le deep learning",
-    "INTELLIGENCE ARTIFICIELLE - Tester un générateur d’images IA",
-    "INTELLIGENCE ARTIFICIELLE - Utiliser GPT pour rédiger un texte",
-    "INTELLIGENCE ARTIFICIELLE - Les limites et risques de l’intelligence artificielle",
-    "INTELLIGENCE ARTIFICIELLE - Fine-tuning d’un modèle GPT",
-    "INTELLIGENCE ARTIFICIELLE - Créer un modèle de prédiction météo",
-    "INTELLIGENCE ARTIFICIELLE - Analyse d’image médicale avec IA",
-    "INTELLIGENCE ARTIFICIELLE - Générer des images avec diffusion stable",
-    "INTELLIGENCE ARTIFICIELLE - Détection d’objets en vidéo",
-    "INTELLIGENCE ARTIFICIELLE - Traduction automatique avec réseaux neuronaux",
-    "INTELLIGENCE ARTIFICIELLE - Détection de fraude financière",
-    "INTELLIGENCE ARTIFICIELLE - Classification de texte avec BERT",
-    "INTELLIGENCE ARTIFICIELLE - Création d’avatars IA réalistes",
-    "INTELLIGENCE ARTIFICIELLE - Analyse prédictive des ventes",
-
-    # BLOCKCHAIN ET CRYPTO
-    "BLOCKCHAIN ET CRYPTO - Comprendre la technologie blockchain",
-    "BLOCKCHAIN ET CRYPTO - Créer un portefeuille Bitcoin",
-    "BLOCKCHAIN ET CRYPTO - Envoyer et recevoir des cryptomonnaies",
-    "BLOCKCHAIN ET CRYPTO - Comprendre les NFT",
-    "BLOCKCHAIN ET CRYPTO - Acheter des cryptos en toute sécurité",
-    "BLOCKCHAIN ET CRYPTO - Utiliser Metamask pour interagir avec la blockchain",
-    "BLOCKCHAIN ET CRYPTO - Comprendre le minage de cryptomonnaies",
-    "BLOCKCHAIN ET CRYPTO - Découvrir les contrats intelligents",
-    "BLOCKCHAIN ET CRYPTO - Comprendre les stablecoins",
-    "BLOCKCHAIN ET CRYPTO - Les risques liés aux cryptomonnaies",
-    "BLOCKCHAIN ET CRYPTO - Comprendre les forks et hard forks",
-    "BLOCKCHAIN ET CRYPTO - Créer un portefeuille multisig",
-    "BLOCKCHAIN ET CRYPTO - Sécuriser ses transactions crypto",
-    "BLOCKCHAIN ET CRYPTO - Analyse des tendances DeFi",
-    "BLOCKCHAIN ET CRYPTO - Créer un token NFT sur Ethereum",
-    "BLOCKCHAIN ET CRYPTO - Comprendre les protocoles Layer 2",
-    "BLOCKCHAIN ET CRYPTO - Automatiser des transactions avec scripts",
-    "BLOCKCHAIN ET CRYPTO - Sécurité et audits smart contracts",
-    "BLOCKCHAIN ET CRYPTO - Comprendre la tokenomics",
-    "BLOCKCHAIN ET CRYPTO - Utiliser les stablecoins pour trading",
-
-    # CYBERCRIMINALITÉ & ENQUÊTES
-    "CYBERCRIMINALITÉ & ENQUÊTES - Comprendre le fonctionnement d’un ransomware",
-    "CYBERCRIMINALITÉ & ENQUÊTES - Étudier un phishing réel",
-    "CYBERCRIMINALITÉ & ENQUÊTES - Détecter une fraude bancaire en ligne",
-    "CYBERCRIMINALITÉ & ENQUÊTES - Comprendre les botnets",
-    "CYBERCRIMINALITÉ & ENQUÊTES - Identifier une attaque par cheval de Troie",
-    "CYBERCRIMINALITÉ & ENQUÊTES - Décoder un malware simple",
-    "CYBERCRIMINALITÉ & ENQUÊTES - Enquêter sur un domaine suspect",
-    "CYBERCRIMINALITÉ & ENQUÊTES - Identifier une campagne de spam",
-    "CYBERCRIMINALITÉ & ENQUÊTES - Comprendre les attaques supply chain",
-    "CYBERCRIMINALITÉ & ENQUÊTES - Les forums clandestins de hackers",
-    "CYBERCRIMINALITÉ & ENQUÊTES - Analyse des ransomwares modernes",
-    "CYBERCRIMINALITÉ & ENQUÊTES - Identifier les phishing sophistiqués",
-    "CYBERCRIMINALITÉ & ENQUÊTES - Techniques d’ingénierie sociale avancées",
-    "CYBERCRIMINALITÉ & ENQUÊTES - Surveillance réseau pour enquêtes",
-    "CYBERCRIMINALITÉ & ENQUÊTES - Forensic sur systèmes compromis",
-    "CYBERCRIMINALITÉ & ENQUÊTES - Détecter intrusion par honeypot",
-    "CYBERCRIMINALITÉ & ENQUÊTES - Analyse d’attaques DDOS",
-    "CYBERCRIMINALITÉ & ENQUÊTES - Rechercher les vulnérabilités web",
-    "CYBERCRIMINALITÉ & ENQUÊTES - Étudier les logiciels espions",
-    "CYBERCRIMINALITÉ & ENQUÊTES - Identifier campagnes de spam avancées",
-
-    # IOT ET OBJETS CONNECTÉS
-    "IOT ET OBJETS CONNECTÉS - Sécuriser une caméra connectée",
-    "IOT ET OBJETS CONNECTÉS - Installer un objet connecté en toute sécurité",
-    "IOT ET OBJETS CONNECTÉS - Comprendre les risques des objets connectés",
-    "IOT ET OBJETS CONNECTÉS - Piratage de voiture connectée (explication théorique)",
-    "IOT ET OBJETS CONNECTÉS - Configurer une montre connectée",
-    "IOT ET OBJETS CONNECTÉS - Protéger un thermostat intelligent",
-    "IOT ET OBJETS CONNECTÉS - Suivi de santé et données privées",
-    "IOT ET OBJETS CONNECTÉS - Détecter une intrusion via objets connectés",
-    "IOT ET OBJETS CONNECTÉS - Sécuriser une maison intelligente",
-    "IOT ET OBJETS CONNECTÉS - Limiter les données collectées par les objets",
-    "IOT ET OBJETS CONNECTÉS - Sécuriser un réseau Wi-Fi IoT",
-    "IOT ET OBJETS CONNECTÉS - Chiffrer les données des capteurs",
-    "IOT ET OBJETS CONNECTÉS - Mettre à jour firmware automatiquement",
-    "IOT ET OBJETS CONNECTÉS - Surveillance des logs IoT",
-    "IOT ET OBJETS CONNECTÉS - Éviter la collecte excessive de données",
-    "IOT ET OBJETS CONNECTÉS - Sécuriser un détecteur de fumée connecté",
-    "IOT ET OBJETS CONNECTÉS - Configurer alertes intrusion",
-    "IOT ET OBJETS CONNECTÉS - Détection d’anomalies IoT",
-    "IOT ET OBJETS CONNECTÉS - Protection de la domotique",
-    "IOT ET OBJETS CONNECTÉS - Gestion des permissions IoT",
-
-    # 5G ET RÉSEAUX
-    "5G ET RÉSEAUX - Comprendre le fonctionnement de la 5G",
-    "5G ET RÉSEAUX - Les avantages et risques de la 5G",
-    "5G ET RÉSEAUX - Configurer un routeur 5G",
-    "5G ET RÉSEAUX - Comparaison entre 4G et 5G",
-    "5G ET RÉSEAUX - Sécurité des réseaux mobiles",
-    "5G ET RÉSEAUX - L’impact de la 5G sur les objets connectés",
-    "5G ET RÉSEAUX - Optimiser son réseau domestique",
-    "5G ET RÉSEAUX - Utiliser la 5G pour le gaming",
-    "5G ET RÉSEAUX - Tester la vitesse de son réseau",
-    "5G ET RÉSEAUX - Déployer un petit réseau 5G privé",
-    "5G ET RÉSEAUX - Sécuriser les communications critiques",
-    "5G ET RÉSEAUX - Analyse des paquets réseau",
-    "5G ET RÉSEAUX - Déploiement réseau privé pour entreprise",
-    "5G ET RÉSEAUX - Mesurer les performances réseau",
-    "5G ET RÉSEAUX - Comparer les technologies LTE et 5G",
-    "5G ET RÉSEAUX - Étudier les antennes et propagation",
-    "5G ET RÉSEAUX - Tester la latence et jitter",
-    "5G ET RÉSEAUX - Détecter les interférences IoT",
-    "5G ET RÉSEAUX - Optimisation QoS pour vidéo et streaming",
-    "5G ET RÉSEAUX - Futur de la 6G et innovations"
-
-     # PENTEST ET HACKING ÉTHIQUE
-    "PENTEST - Introduction au hacking éthique",
-    "PENTEST - Scanner un réseau avec Nmap",
-    "PENTEST - Exploiter les vulnérabilités avec Metasploit",
-    "PENTEST - Analyse de paquets avec Wireshark",
-    "PENTEST - Test d’intrusion sur applications web",
-    "PENTEST - Créer un lab de test virtuel",
-    "PENTEST - Techniques d’escalade de privilèges",
-    "PENTEST - Utiliser Burp Suite pour tester la sécurité",
-    "PENTEST - Détection et contournement de firewall",
-    "PENTEST - Social engineering et sécurité humaine",
-
-    # PROGRAMMATION AVANCÉE
-    "PROGRAMMATION - Introduction à Python avancé",
-    "PROGRAMMATION - Programmation orientée objet en Java",
-    "PROGRAMMATION - Créer des scripts automatisés en Bash",
-    "PROGRAMMATION - Développement web fullstack (HTML/CSS/JS)",
-    "PROGRAMMATION - Frameworks React et Vue.js",
-    "PROGRAMMATION - Développement d’API REST avec Python",
-    "PROGRAMMATION - Débogage et optimisation de code",
-    "PROGRAMMATION - Gestion de bases de données SQL",
-    "PROGRAMMATION - Développement de jeux vidéo avec Unity",
-    "PROGRAMMATION - Introduction au Rust et sécurité mémoire",
-
-    # RÉSEAUX & SÉCURITÉ
-    "RÉSEAUX - Comprendre le modèle OSI",
-    "RÉSEAUX - Configuration d’un routeur Cisco",
-    "RÉSEAUX - VPN et tunnels sécurisés",
-    "RÉSEAUX - Détection d’intrusions avec Snort",
-    "RÉSEAUX - Analyse de logs réseau",
-    "RÉSEAUX - Sécuriser un serveur DNS",
-    "RÉSEAUX - Protection contre DDoS",
-    "RÉSEAUX - Surveillance réseau avec Nagios",
-    "RÉSEAUX - Configurer un proxy transparent",
-    "RÉSEAUX - Détection de vulnérabilités réseau",
-
-    # CLOUD & INFRASTRUCTURE
-    "CLOUD - Introduction à AWS",
-    "CLOUD - Déployer un serveur web sur Azure",
-    "CLOUD - Sécuriser des instances EC2",
-    "CLOUD - Gestion des permissions IAM",
-    "CLOUD - Stockage sécurisé avec S3",
-    "CLOUD - Mise en place de CI/CD",
-    "CLOUD - Supervision et monitoring des services",
-    "CLOUD - Conteneurs Docker et Kubernetes",
-    "CLOUD - Automatisation avec Terraform",
-    "CLOUD - Haute disponibilité et tolérance aux pannes",
-
-    # DATA & ANALYTICS
-    "DATA - Introduction au Big Data",
-    "DATA - Manipulation de données avec Python Pandas",
-    "DATA - Visualisation avec Matplotlib et Seaborn",
-    "DATA - Analyse prédictive avec Scikit-learn",
-    "DATA - Bases de données NoSQL (MongoDB)",
-    "DATA - Création de dashboards avec PowerBI",
-    "DATA - Traitement de données en temps réel",
-    "DATA - Analyse de logs pour la sécurité",
-    "DATA - Machine Learning appliqué au e-commerce",
-    "DATA - Modélisation statistique avancée",
-
-    # INTERNET DES OBJETS & AUTOMATISATION
-    "IOT - Créer un capteur connecté avec Arduino",
-    "IOT - Sécuriser un réseau domotique",
-    "IOT - Automatiser des tâches avec Raspberry Pi",
-    "IOT - Collecte et analyse de données IoT",
-    "IOT - Surveillance de l’énergie domestique",
-    "IOT - Communication MQTT sécurisée",
-    "IOT - Détection d’anomalies et alertes",
-    "IOT - Déploiement IoT à grande échelle",
-    "IOT - Optimisation de la consommation énergétique",
-    "IOT - Maintenance et mise à jour sécurisée",
-
-    # CRYPTO & FINANCE
-    "CRYPTO - Stratégies de trading crypto",
-    "CRYPTO - Analyse technique sur cryptos",
-    "CRYPTO - Sécurisation d’exchanges",
-    "CRYPTO - Smart contracts Ethereum avancés",
-    "CRYPTO - Audit de smart contracts",
-    "CRYPTO - Défi DeFi et yield farming",
-    "CRYPTO - Sécurité des wallets hardware",
-    "CRYPTO - Comprendre les stablecoins et pegged assets",
-    "CRYPTO - Gestion de portefeuilles diversifiés",
-    "CRYPTO - Légalité et régulations crypto",
-
-    # IA & AUTOMATISATION
-    "IA - Automatiser la génération de contenus",
-    "IA - Création de modèles NLP personnalisés",
-    "IA - IA générative pour images et vidéos",
-    "IA - Chatbots conversationnels avancés",
-    "IA - Analyse de sentiment et prédiction",
-    "IA - IA pour la cybersécurité",
-    "IA - IA pour la finance et trading",
-    "IA - Optimisation de processus avec IA",
-    "IA - Reconnaissance faciale et éthique",
-    "IA - Détection de deepfake et fraude",
-
-    # CYBERCRIMINALITÉ & FORENSIC
-    "FORENSIC - Analyse de systèmes compromis",
-    "FORENSIC - Récupération de fichiers supprimés",
-    "FORENSIC - Étude de logs pour enquêtes",
-    "FORENSIC - Analyse de malware avancé",
-    "FORENSIC - Techniques de reverse engineering",
-    "FORENSIC - Étude de ransomwares récents",
-    "FORENSIC - Capture et analyse de paquets",
-    "FORENSIC - Forensic cloud et virtualisation",
-    "FORENSIC - Audit sécurité web",
-    "FORENSIC - Analyse réseau pour intrusions",
-
-    # NOUVELLES TECHNOLOGIES
-    "TECH - Blockchain avancée et applications",
-    "TECH - Réalité augmentée et VR",
-    "TECH - Impression 3D et applications industrielles",
-    "TECH - Robotique et IA",
-    "TECH - Edge computing et IoT",
-    "TECH - Quantum computing introduction",
-    "TECH - Technologies vertes et énergie renouvelable",
-    "TECH - Smart cities et capteurs intelligents",
-    "TECH - Voitures autonomes et sécurité",
-    "TECH - Futur des communications satellites",
-
-        # JEUX VIDÉO & CYBERSÉCURITÉ GAMING
-    "GAMING - Sécuriser son compte Steam",
-    "GAMING - Prévenir les cheat et hacks en ligne",
-    "GAMING - Analyse des vulnérabilités des serveurs de jeux",
-    "GAMING - Sécurité des microtransactions",
-    "GAMING - Protection des données personnelles en jeu",
-    "GAMING - Optimisation réseau pour gaming compétitif",
-    "GAMING - Détection de triche via anti-cheat",
-    "GAMING - Modding et risques de sécurité",
-    "GAMING - Créer son serveur de jeu sécurisé",
-    "GAMING - Analyse de malware lié aux jeux",
-
-    # RÉALITÉ VIRTUELLE & AUGMENTÉE
-    "VR/AR - Introduction à la VR/AR",
-    "VR/AR - Développement d’applications VR avec Unity",
-    "VR/AR - Sécurité et vie privée en VR",
-    "VR/AR - ARKit et ARCore pour débutants",
-    "VR/AR - Optimisation de performance VR",
-    "VR/AR - Création d’expériences immersives",
-    "VR/AR - Tracking et interactions utilisateurs",
-    "VR/AR - Débogage et tests VR/AR",
-    "VR/AR - Développement multi-plateformes VR/AR",
-    "VR/AR - Futur de la réalité mixte",
-
-    # ÉLECTRONIQUE & HACKING HARDWARE
-    "HARDWARE - Introduction au hacking hardware",
-    "HARDWARE - Analyse des circuits électroniques",
-    "HARDWARE - Microcontrôleurs et sécurité",
-    "HARDWARE - Reverse engineering de PCB",
-    "HARDWARE - Piratage de cartes RFID/NFC",
-    "HARDWARE - Attaques sur IoT et capteurs",
-    "HARDWARE - Sécurisation d’appareils embarqués",
-    "HARDWARE - Techniques de soldering et prototyping",
-    "HARDWARE - Logic analyzers pour hacking",
-    "HARDWARE - Détection de malwares hardware",
-
-    # ETHICAL AI & INTELLIGENCE ARTIFICIELLE RESPONSABLE
-    "ETHICAL_AI - Principes d’IA responsable",
-    "ETHICAL_AI - Biais et fairness dans les modèles",
-    "ETHICAL_AI - Protection de la vie privée avec IA",
-    "ETHICAL_AI - IA explicable et interprétable",
-    "ETHICAL_AI - IA et réglementation",
-    "ETHICAL_AI - Sécuriser les modèles ML",
-    "ETHICAL_AI - Prévention des deepfakes malveillants",
-    "ETHICAL_AI - IA pour la cybersécurité",
-    "ETHICAL_AI - IA pour la santé et bioéthique",
-    "ETHICAL_AI - Détection des modèles biaisés",
-
-    # FUTUR DES TECH & INNOVATION
-    "FUTUR_TECH - Quantum computing et applications",
-    "FUTUR_TECH - Edge computing et IoT avancé",
-    "FUTUR_TECH - Smart cities et infrastructures intelligentes",
-    "FUTUR_TECH - Technologies spatiales et satellites",
-    "FUTUR_TECH - Véhicules autonomes et sécurité",
-    "FUTUR_TECH - Energies renouvelables et tech verte",
-    "FUTUR_TECH - Robotique avancée et IA",
-    "FUTUR_TECH - Nanotechnologies et applications",
-    "FUTUR_TECH - Biotechnologie et santé connectée",
-    "FUTUR_TECH - Innovations dans la blockchain",
-
-    # ÉDUCATION & FORMATION EN LIGNE
-    "EDUCATION - Créer un cours en ligne",
-    "EDUCATION - Plateformes e-learning et LMS",
-    "EDUCATION - Sécurité des données des étudiants",
-    "EDUCATION - Gamification et engagement",
-    "EDUCATION - Analyse des performances d’apprentissage",
-    "EDUCATION - Automatisation des évaluations",
-    "EDUCATION - Création de vidéos éducatives",
-    "EDUCATION - Outils collaboratifs pour l’enseignement",
-    "EDUCATION - IA pour l’éducation personnalisée",
-    "EDUCATION - Éducation sur la cybersécurité",
-
-    # MÉTAVERSE & WEB3
-    "WEB3 - Introduction au Web3 et décentralisation",
-    "WEB3 - Créer un NFT sur Ethereum",
-    "WEB3 - Développer un DApp sécurisé",
-    "WEB3 - Smart contracts et audit",
-    "WEB3 - DAO et gouvernance décentralisée",
-    "WEB3 - Tokenomics et cryptomonnaies",
-    "WEB3 - Interaction avec la blockchain via API",
-    "WEB3 - Sécuriser son portefeuille Web3",
-    "WEB3 - Gaming et NFT",
-    "WEB3 - Futur du Web décentralisé",
-
-    # CYBERSÉCURITÉ AVANCÉE
-"CYBERSEC - Pentesting avancé avec Metasploit",
-"CYBERSEC - Exploitation de vulnérabilités web",
-"CYBERSEC - Attaques et défense réseau",
-"CYBERSEC - Sécuriser les serveurs Linux",
-"CYBERSEC - Analyse forensique d’un incident",
-"CYBERSEC - Détection et mitigation DDoS",
-"CYBERSEC - Reverse engineering de malware",
-"CYBERSEC - Sécurité des applications mobiles",
-"CYBERSEC - Hacking de protocoles IoT",
-"CYBERSEC - Bug bounty et rapport de vulnérabilité",
-
-# CLOUD & INFRASTRUCTURE
-"CLOUD - Introduction à AWS, Azure, GCP",
-"CLOUD - Sécuriser un serveur cloud",
-"CLOUD - Déploiement d’application scalable",
-"CLOUD - Infrastructure as Code avec Terraform",
-"CLOUD - Monitoring et logging cloud",
-"CLOUD - Conteneurisation avec Docker",
-"CLOUD - Orchestration avec Kubernetes",
-"CLOUD - Sauvegarde et reprise après sinistre",
-"CLOUD - Réseaux virtuels et VPN",
-"CLOUD - Automatisation des tâches cloud",
-
-# DATA SCIENCE & ANALYTICS
-"DATA - Introduction au Data Science",
-"DATA - Nettoyage et préparation de données",
-"DATA - Visualisation de données avec Python",
-"DATA - Analyse statistique avancée",
-"DATA - Machine Learning pour prédictions",
-"DATA - NLP et traitement du langage",
-"DATA - Big Data et Spark",
-"DATA - Analyse de séries temporelles",
-"DATA - Détection d’anomalies",
-"DATA - Déploiement de modèles ML en production",
-
-# DÉVELOPPEMENT WEB & MOBILE
-"WEB - HTML et CSS pour débutants",
-"WEB - JavaScript avancé",
-"WEB - Frameworks front-end (React, Vue, Angular)",
-"WEB - Développement back-end avec Node.js",
-"WEB - Sécuriser une application web",
-"WEB - API REST et GraphQL",
-"WEB - Déploiement web sécurisé",
-"WEB - Applications mobiles avec Flutter",
-"WEB - Optimisation performance web",
-"WEB - Progressive Web Apps (PWA)",
-
-# RÉSEAUX & TELECOM
-"NETWORK - Concepts TCP/IP et modèles OSI",
-"NETWORK - Sécuriser un réseau WiFi",
-"NETWORK - VPN et chiffrement réseau",
-"NETWORK - Analyse de trafic avec Wireshark",
-"NETWORK - Routage et switching avancé",
-"NETWORK - Détection d’intrusion IDS/IPS",
-"NETWORK - Protocoles réseau sécurisés",
-"NETWORK - Monitoring réseau avec Nagios",
-"NETWORK - Troubleshooting réseau",
-"NETWORK - Réseaux privés et segmentation",
-
-# PRIVACY & PROTECTION DES DONNÉES
-"PRIVACY - Gestion des mots de passe sécurisés",
-"PRIVACY - Chiffrement des emails",
-"PRIVACY - VPN et proxy avancé",
-"PRIVACY - Anonymisation des données",
-"PRIVACY - Sécuriser ses communications en ligne",
-"PRIVACY - Vie privée sur les réseaux sociaux",
-"PRIVACY - Protection contre le tracking web",
-"PRIVACY - Sécurité des appareils mobiles",
-"PRIVACY - Stockage sécurisé des données",
-"PRIVACY - Audit de confidentialité personnel",
-
-# BIOTECH & SCIENCES
-"BIOTECH - Introduction à la biotechnologie",
-"BIOTECH - Édition génétique CRISPR",
-"BIOTECH - Bioinformatique pour débutants",
-"BIOTECH - Sécurité et éthique en biotech",
-"BIOTECH - Capteurs biomédicaux connectés",
-"BIOTECH - Analyse de séquences ADN",
-"BIOTECH - Modélisation biologique",
-"BIOTECH - Robotique et biotechnologie",
-"BIOTECH - Nanobiotechnologies",
-"BIOTECH - Intelligence artificielle appliquée à la santé",
-]
+MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", "4"))
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "1"))
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+SMTP_SSL = os.getenv("SMTP_SSL", "1") == "1"
+OUTBOX_DIR = os.getenv("OUTBOX_DIR", ".data/outbox")
+DELIVERY_RETRIES = int(os.getenv("DELIVERY_RETRIES", "3"))
+DELIVERY_BACKOFF = float(os.getenv("DELIVERY_BACKOFF", "2"))
+LEASE_TTL_S = float(os.getenv("LEASE_TTL_S", "900"))
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))
+TITLE_CANDIDATES = int(os.getenv("TITLE_CANDIDATES", "1"))
+TITLE_BATCH = os.getenv("TITLE_BATCH", "1") == "1"
+GEMINI_CACHE = os.getenv("GEMINI_CACHE", "0") == "1"
+GEMINI_CACHE_DIR = os.getenv("GEMINI_CACHE_DIR", ".data/gemini_cache")
+GEMINI_CACHE_MAX_MB = float(os.getenv("GEMINI_CACHE_MAX_MB", "200"))
+GEMINI_CACHE_TTL_HOURS = float(os.getenv("GEMINI_CACHE_TTL_HOURS", "168"))
+STREAM_ARTICLES = os.getenv("STREAM_ARTICLES", "0") == "1"
+# Client-side model limits shared by every blog (0 = no limit).
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "0"))
+GEMINI_TPM = float(os.getenv("GEMINI_TPM", "0"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_RETRIES = int(os.getenv("GEMINI_RETRIES", "5"))
+GEMINI_BACKOFF = float(os.getenv("GEMINI_BACKOFF", "2"))
+GEMINI_BACKOFF_MAX = float(os.getenv("GEMINI_BACKOFF_MAX", "60"))
+ARTICLE_RETRIES = int(os.getenv("ARTICLE_RETRIES", "1"))
+# Hedged article calls: a second identical request once the first is slower
+# than HEDGE_PERCENTILE of the recorded article latencies, for at most
+# HEDGE_MAX_RATE of the blog's last LATENCY_SAMPLES article calls.
+HEDGE_ARTICLES = os.getenv("HEDGE_ARTICLES", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_MAX_RATE = float(os.getenv("HEDGE_MAX_RATE", "0.1"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+LATENCY_SAMPLES = int(os.getenv("LATENCY_SAMPLES", "200"))
+METRICS_JSONL = os.getenv("METRICS_JSONL", "")
+METRICS_PROM = os.getenv("METRICS_PROM", "")
+# The catalog and its id registry live next to this script, wherever it runs.
+_HERE = os.path.dirname(os.path.abspath(__file__))
+CATALOG_FILE = os.getenv("CATALOG_FILE", os.path.join(_HERE, "categories.txt"))
+CATALOG_IDS = os.getenv("CATALOG_IDS", os.path.join(_HERE, ".data", "category_ids.json"))
+CATALOG_CACHE = os.getenv("CATALOG_CACHE", os.path.join(_HERE, ".data", "categories.cache.json"))
+# Minimum days between two posts of a category, per catalog section,
+# e.g. SECTION_CADENCE='{"BIOTECH": 30}'. Other sections use DEFAULT_CADENCE_DAYS.
+# When too few categories are due, runs post fewer articles.
+SECTION_CADENCE = json.loads(os.getenv("SECTION_CADENCE", "{}"))
+DEFAULT_CADENCE_DAYS = int(os.getenv("DEFAULT_CADENCE_DAYS", "0"))
+# JSON file listing several blogs to serve from one process (see BLOGS).
+BLOGS_FILE = os.getenv("BLOGS_FILE", "")
+# Daemon slots, UTC: "HH:MM task [args]" separated by ";", e.g.
+# DAEMON_SCHEDULE="02:00 pregenerate 7; 08:00 run".
+DAEMON_SCHEDULE = os.getenv("DAEMON_SCHEDULE", "08:00 run")
+# Budgets (0 = unlimited): tokens and USD per UTC day, seconds per run.
+TOKEN_BUDGET_DAILY = int(os.getenv("TOKEN_BUDGET_DAILY", "0"))
+COST_BUDGET_DAILY = float(os.getenv("COST_BUDGET_DAILY", "0"))
+RUN_TIME_BUDGET_S = float(os.getenv("RUN_TIME_BUDGET_S", "0"))
+PRICE_INPUT_PER_MTOK = float(os.getenv("PRICE_INPUT_PER_MTOK", "0.30"))
+PRICE_OUTPUT_PER_MTOK = float(os.getenv("PRICE_OUTPUT_PER_MTOK", "2.50"))
+
+# ---------------- METRICS ----------------
+# Stage durations, counters and sizes for one run. At the end of main()
+# they are summarized on stdout, appended as JSON lines to METRICS_JSONL
+# and written as a Prometheus textfile to METRICS_PROM (both optional).
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.listeners = []
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+            self.events = []
+            self.counters = {}
+
+    def _event(self, event: dict):
+        event["ts"] = time.time()
+        blog = current_blog().name
+        if blog:
+            event["blog"] = blog
+        with self.lock:
+            self.events.append(event)
+
+    @contextlib.contextmanager
+    def stage(self, name: str, **labels):
+        for listener in self.listeners:
+            listener.stage_started(name)
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            self._event({"type": "stage", "stage": name, "duration_s": round(duration, 6),
+                         "error": error, **labels})
+            for listener in self.listeners:
+                listener.stage_finished(name)
+
+    def count(self, name: str, n: int = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name: str, value: float, **labels):
+        self._event({"type": "value", "name": name, "value": value, **labels})
+
+    def stage_totals(self) -> dict:
+        totals = {}
+        with self.lock:
+            events = list(self.events)
+        for e in events:
+            if e["type"] != "stage":
+                continue
+            row = totals.setdefault(e["stage"], {"count": 0, "sum": 0.0, "max": 0.0, "errors": {}})
+            row["count"] += 1
+            row["sum"] += e["duration_s"]
+            row["max"] = max(row["max"], e["duration_s"])
+            if e["error"]:
+                row["errors"][e["error"]] = row["errors"].get(e["error"], 0) + 1
+        return totals
+
+    def summary_lines(self) -> list:
+        lines = []
+        for stage, row in sorted(self.stage_totals().items(), key=lambda kv: -kv[1]["sum"]):
+            errors = sum(row["errors"].values())
+            lines.append(f"{stage}: n={row['count']} total={row['sum']:.2f}s "
+                         f"max={row['max']:.2f}s erreurs={errors}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name}={value}")
+        return lines
+
+    def export(self, jsonl_path: str = None, prom_path: str = None):
+        jsonl_path = METRICS_JSONL if jsonl_path is None else jsonl_path
+        prom_path = METRICS_PROM if prom_path is None else prom_path
+        if jsonl_path:
+            ensure_history_path(jsonl_path)
+            with self.lock:
+                events = list(self.events)
+                counters = dict(self.counters)
+            with open(jsonl_path, "a", encoding="utf-8") as f:
+                for e in events:
+                    f.write(json.dumps(dict(e, run=self.run_id), ensure_ascii=False) + "\n")
+                f.write(json.dumps({"type": "counters", "run": self.run_id, "ts": time.time(),
+                                    "counters": counters}) + "\n")
+        if prom_path:
+            lines = [
+                "# TYPE blogger_stage_duration_seconds summary",
+            ]
+            totals = self.stage_totals()
+            for stage, row in sorted(totals.items()):
+                lines.append(f'blogger_stage_duration_seconds_sum{{stage="{stage}"}} {row["sum"]:.6f}')
+                lines.append(f'blogger_stage_duration_seconds_count{{stage="{stage}"}} {row["count"]}')
+            lines.append("# TYPE blogger_stage_duration_seconds_max gauge")
+            for stage, row in sorted(totals.items()):
+                lines.append(f'blogger_stage_duration_seconds_max{{stage="{stage}"}} {row["max"]:.6f}')
+            lines.append("# TYPE blogger_stage_errors_total counter")
+            for stage, row in sorted(totals.items()):
+                for error, n in sorted(row["errors"].items()):
+                    lines.append(f'blogger_stage_errors_total{{stage="{stage}",error="{error}"}} {n}')
+            lines.append("# TYPE blogger_events_total counter")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f'blogger_events_total{{name="{name}"}} {value}')
+            lines.append("# TYPE blogger_last_run_timestamp_seconds gauge")
+            lines.append(f"blogger_last_run_timestamp_seconds {time.time():.0f}")
+            ensure_history_path(prom_path)
+            tmp = prom_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            os.replace(tmp, prom_path)
+
+METRICS = Metrics()
+
+def timed_stage(name: str):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with METRICS.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# ---------------- PROFILING ----------------
+# `--profile` wraps a command in cProfile and tracemalloc. The run is then
+# executed in a single thread (cProfile only sees the thread it was enabled
+# in) and a tracemalloc snapshot is diffed around every metrics stage, so
+# allocations are attributed to history load, title loop, article
+# generation, MIME build and save.
+class RunProfiler:
+    def __init__(self, out_dir: str, top: int = 15):
+        self.out_dir = out_dir
+        self.top = top
+        self.profile = None
+        self.open_stages = []
+        self.allocations = {}
+        self.stage_runs = {}
+
+    def start(self):
+        import cProfile
+        import tracemalloc
+        tracemalloc.start(10)
+        METRICS.listeners.append(self)
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def _snapshot(self):
+        import tracemalloc
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)])
+
+    def stage_started(self, name: str):
+        self.open_stages.append((name, self._snapshot()))
+
+    def stage_finished(self, name: str):
+        while self.open_stages:
+            started_name, before = self.open_stages.pop()
+            if started_name == name:
+                break
+        else:
+            return
+        self.stage_runs[name] = self.stage_runs.get(name, 0) + 1
+        per_line = self.allocations.setdefault(name, {})
+        for diff in self._snapshot().compare_to(before, "lineno"):
+            if diff.size_diff <= 0:
+                continue
+            where = str(diff.traceback[0])
+            size, count = per_line.get(where, (0, 0))
+            per_line[where] = (size + diff.size_diff, count + diff.count_diff)
+
+    def stop(self) -> tuple:
+        import pstats
+        import tracemalloc
+        self.profile.disable()
+        if self in METRICS.listeners:
+            METRICS.listeners.remove(self)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        os.makedirs(self.out_dir, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        stats_path = os.path.join(self.out_dir, f"profile-{stamp}.pstats")
+        report_path = os.path.join(self.out_dir, f"allocations-{stamp}.txt")
+        self.profile.dump_stats(stats_path)
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(f"Pic mémoire tracé: {peak / 1024:.1f} KiB\n")
+            for name, per_line in self.allocations.items():
+                total = sum(size for size, _ in per_line.values())
+                f.write(f"\n== {name} (x{self.stage_runs.get(name, 0)}): +{total / 1024:.1f} KiB ==\n")
+                ranked = sorted(per_line.items(), key=lambda kv: -kv[1][0])[:self.top]
+                for where, (size, count) in ranked:
+                    f.write(f"{size / 1024:10.1f} KiB {count:8d} blocs  {where}\n")
+            f.write("\n== cProfile (cumulatif) ==\n")
+            pstats.Stats(self.profile, stream=f).sort_stats("cumulative").print_stats(30)
+        return stats_path, report_path
+
+PROFILER = None
 
 # ---------------- HISTORY HANDLING ----------------
 def ensure_history_path(path: str):
@@ -858,19 +353,16 @@ def ensure_history_path(path: str):
         os.makedirs(folder, exist_ok=True)
 
 def load_history(path: str):
-    ensure_history_path(path)
-    if not os.path.exists(path):
-        history = {
-            "titles": [],
-            "days": {},
-            "cat_index": 0,
-            "category_loops": {},
-            "recent_articles": {}
-        }
-        return history
-    try:
-        history = json.load(open(path, "r", encoding="utf-8"))
-    except Exception:
+    history = None
+    if os.path.exists(path):
+        # Snapshots are replaced atomically, so an unreadable file is a real
+        # problem: starting from an empty history would repost old titles.
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                history = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"Historique illisible: {path}: {e}") from e
+    if history is None:
         history = {
             "titles": [],
             "days": {},
@@ -885,46 +377,1744 @@ def load_history(path: str):
     history.setdefault("cat_index", 0)
     history.setdefault("category_loops", {})
     history.setdefault("recent_articles", {})
+    history.setdefault("last_posted", {})
 
-    # --- ENSURE ALL CATEGORIES HAVE entries ---
-    for cat in CATEGORIES:
-        if cat not in history["category_loops"]:
-            history["category_loops"][cat] = 0
-        if cat not in history["recent_articles"]:
-            history["recent_articles"][cat] = []
+    # --- TITLE INDEX: in memory a set of truncated digests ---
+    history["titles"] = decode_title_index(history.pop("title_hashes", ""), history["titles"])
+    history["_near_dup"] = load_near_dup_index(near_dup_path(path), history)
 
     return history
 
+def history_to_json(data: dict) -> dict:
+    # Keys starting with "_" hold runtime-only objects and are not saved.
+    out = {"title_hashes": encode_title_index(data.get("titles", ()))}
+    out.update((k, v) for k, v in data.items() if k != "titles" and not k.startswith("_"))
+    return out
+
+def atomic_write_json(path: str, data, **dump_kwargs):
+    # Write to a temporary file, fsync, then rename over the target.
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, **dump_kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
 def save_history(path: str, data: dict):
     ensure_history_path(path)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    atomic_write_json(path, history_to_json(data), indent=2)
+    if "_near_dup" in data:
+        data["_near_dup"].save(near_dup_path(path))
+
+# ---------------- CATEGORY CATALOG ----------------
+# Categories live in CATALOG_FILE ("SECTION - Sujet" per line). Each one gets
+# a stable integer id recorded in CATALOG_IDS, so the history is keyed on
+# str(id) and survives reordering, insertions and duplicate removal. The
+# compiled catalog is cached in CATALOG_CACHE until either file changes.
+# Every spelling in CATALOG_IDS whose id is still in the catalog resolves to
+# it: to fix a category's name without losing its history, add the new
+# spelling to CATALOG_IDS with the existing id and keep the old one.
+def normalize_category(text: str) -> str:
+    # The catalog writes apostrophes as U+2019: "d'un" and "d’un" are one name.
+    text = unicodedata.normalize("NFC", text).replace("'", "\u2019")
+    return " ".join(text.split())
+
+class Catalog:
+    def __init__(self, entries: list, aliases: dict = None):
+        self.entries = entries
+        self.keys = [str(e["id"]) for e in entries]
+        self.by_key = {str(e["id"]): e for e in entries}
+        self.position = {key: i for i, key in enumerate(self.keys)}
+        self.by_name = {folded: str(i) for folded, i in (aliases or {}).items()}
+        self.by_name.update((e["name"].casefold(), str(e["id"])) for e in entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def name(self, key: str) -> str:
+        entry = self.by_key.get(key)
+        return entry["name"] if entry else key
+
+    def resolve(self, value):
+        # Accepts a key or a full category name (pre-catalog history).
+        value = str(value)
+        if value in self.by_key:
+            return value
+        return self.by_name.get(normalize_category(value).casefold())
+
+def _catalog_fingerprint(raw: bytes, ids_path: str) -> str:
+    digest = hashlib.sha256(raw)
+    if os.path.exists(ids_path):
+        with open(ids_path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def compile_catalog(raw: bytes, ids_path: str) -> tuple:
+    # Returns the entries and the other spellings of their ids ({folded: id}).
+    registry = {"next_id": 1, "ids": {}}
+    if os.path.exists(ids_path):
+        with open(ids_path, "r", encoding="utf-8") as f:
+            registry = json.load(f)
+    entries = []
+    seen = set()
+    used = set()
+    changed = False
+    for line in raw.decode("utf-8").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        name = normalize_category(line)
+        folded = name.casefold()
+        if folded in seen:
+            continue
+        seen.add(folded)
+        if registry["ids"].get(folded) in used or folded not in registry["ids"]:
+            # New, or an old spelling of a category listed above: own id.
+            registry["ids"][folded] = registry["next_id"]
+            registry["next_id"] += 1
+            changed = True
+        used.add(registry["ids"][folded])
+        section, _, topic = name.partition(" - ")
+        entries.append({"id": registry["ids"][folded], "section": section.strip(),
+                        "topic": topic.strip(), "name": name})
+    if changed:
+        ensure_history_path(ids_path)
+        atomic_write_json(ids_path, registry, indent=1)
+    aliases = {folded: i for folded, i in registry["ids"].items()
+               if i in used and folded not in seen}
+    return entries, aliases
+
+def load_catalog(path: str = CATALOG_FILE, ids_path: str = CATALOG_IDS,
+                 cache_path: str = CATALOG_CACHE) -> Catalog:
+    with open(path, "rb") as f:
+        raw = f.read()
+    fingerprint = _catalog_fingerprint(raw, ids_path)
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("fingerprint") == fingerprint:
+            return Catalog(cached["entries"], cached.get("aliases"))
+    except (OSError, ValueError):
+        pass
+    entries, aliases = compile_catalog(raw, ids_path)
+    ensure_history_path(cache_path)
+    atomic_write_json(cache_path, {"fingerprint": _catalog_fingerprint(raw, ids_path),
+                                   "entries": entries, "aliases": aliases})
+    return Catalog(entries, aliases)
+
+CATALOG = None
+_catalog_lock = threading.Lock()
+
+def get_catalog() -> Catalog:
+    # Compiled on first use, so importing main reads and writes nothing.
+    global CATALOG
+    with _catalog_lock:
+        if CATALOG is None:
+            CATALOG = load_catalog()
+    return CATALOG
+
+def migrate_category_keys(history: dict):
+    # Re-keys histories written before the catalog (full category names).
+    catalog = current_catalog()
+    for field in ("category_loops", "recent_articles", "day_rollup"):
+        entries = history.get(field, {})
+        if all(k in catalog.by_key for k in entries):
+            continue
+        migrated = {}
+        for cat, value in entries.items():
+            key = catalog.resolve(cat) or cat
+            if key not in migrated:
+                migrated[key] = value
+            elif field == "category_loops":
+                migrated[key] = max(migrated[key], value)
+            elif field == "recent_articles":
+                migrated[key] = (migrated[key] + value)[-7:]
+            else:
+                migrated[key] += value
+        history[field] = migrated
+    for day, cats in history.get("days", {}).items():
+        history["days"][day] = [catalog.resolve(c) or c for c in cats]
+    if "cat_cursor" not in history and len(catalog):
+        history["cat_cursor"] = catalog.keys[history.get("cat_index", 0) % len(catalog)]
+    # Snapshots older than last_posted rebuild it from the retained days.
+    last = history.setdefault("last_posted", {})
+    for day, cats in history.get("days", {}).items():
+        for cat in cats:
+            last[cat] = max(day, last.get(cat, ""))
+
+# ---------------- BLOGS ----------------
+# A blog is where articles are mailed, which catalog they come from and
+# where its history and outbox live. Without BLOGS_FILE the process serves
+# one blog configured by the environment. With it, every blog of the file
+# is served concurrently and they share the Gemini client, the response
+# cache and the SMTP pool. The blog being served is held in a context
+# variable: the pipeline reads its settings from current_blog(), and
+# run_jobs hands the context to its worker threads.
+class Blog:
+    """Per-blog settings; those left unset fall back to the environment."""
+
+    def __init__(self, name: str = "", mail: str = None, mail_env: str = None,
+                 catalog: Catalog = None, history_file: str = None, history_db: str = None,
+                 history_backend: str = None, outbox_dir: str = None,
+                 articles_per_day: int = None, ledger=None, hedger=None,
+                 catalog_file: str = None):
+        self.name = name
+        self.mail_env = mail_env or "BLOGGER_SECRET_MAIL"
+        self._mail = mail
+        self._catalog = catalog
+        self._history_file = history_file
+        self._history_db = history_db
+        self._history_backend = history_backend
+        self._outbox_dir = outbox_dir
+        self._articles_per_day = articles_per_day
+        self._ledger = ledger
+        self._hedger = hedger
+        self._catalog_file = catalog_file
+        self.warm_store = None
+
+    @property
+    def mail(self) -> str:
+        return self._mail or require_env(self.mail_env)
+
+    @property
+    def catalog(self) -> Catalog:
+        return get_catalog() if self._catalog is None else self._catalog
+
+    @property
+    def catalog_file(self) -> str:
+        return self._catalog_file or CATALOG_FILE
+
+    @property
+    def history_file(self) -> str:
+        return self._history_file or HISTORY_FILE
+
+    @property
+    def history_db(self) -> str:
+        return self._history_db or HISTORY_DB
+
+    @property
+    def history_backend(self) -> str:
+        return self._history_backend or HISTORY_BACKEND
+
+    @property
+    def outbox_dir(self) -> str:
+        return self._outbox_dir or OUTBOX_DIR
+
+    @property
+    def articles_per_day(self) -> int:
+        return ARTICLES_PER_DAY if self._articles_per_day is None else self._articles_per_day
+
+    @property
+    def ledger(self):
+        return TOKEN_LEDGER if self._ledger is None else self._ledger
+
+    @property
+    def hedger(self):
+        return HEDGER if self._hedger is None else self._hedger
+
+DEFAULT_BLOG = Blog()
+_CURRENT_BLOG = contextvars.ContextVar("blog", default=None)
+
+def current_blog() -> Blog:
+    return _CURRENT_BLOG.get() or DEFAULT_BLOG
+
+def current_catalog() -> Catalog:
+    return current_blog().catalog
+
+def in_blog(blog: Blog, func, *args, **kwargs):
+    token = _CURRENT_BLOG.set(blog)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _CURRENT_BLOG.reset(token)
+
+def load_blogs(path: str) -> list:
+    # {"blogs": [{"name": "...", "mail_env": "...", "catalog": "...",
+    #             "articles_per_day": 2, ...}]}. State defaults to .data/<name>/.
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    blogs = []
+    default_key = (os.path.abspath(CATALOG_FILE), os.path.abspath(CATALOG_IDS))
+    catalogs = {}
+    for entry in config.get("blogs", []):
+        name = entry.get("name")
+        if not isinstance(name, str) or not re.fullmatch(r"[\w.-]+", name):
+            raise ValueError(f"{path}: nom de blog invalide: {name!r}")
+        if any(b.name == name for b in blogs):
+            raise ValueError(f"{path}: blog en double: {name}")
+        data_dir = entry.get("data_dir", os.path.join(".data", name))
+        catalog_file = entry.get("catalog", CATALOG_FILE)
+        if "catalog" in entry or "catalog_ids" in entry:
+            ids_path = entry.get("catalog_ids", os.path.join(data_dir, "category_ids.json"))
+        else:
+            ids_path = CATALOG_IDS
+        key = (os.path.abspath(catalog_file), os.path.abspath(ids_path))
+        if key == default_key:
+            catalogs[key] = get_catalog()
+        elif key not in catalogs:
+            catalogs[key] = load_catalog(catalog_file, ids_path,
+                                         os.path.join(data_dir, "categories.cache.json"))
+        per_day = entry.get("articles_per_day")
+        blogs.append(Blog(
+            name,
+            mail=entry.get("mail"),
+            mail_env=entry.get("mail_env"),
+            catalog=catalogs[key],
+            history_file=entry.get("history", os.path.join(data_dir, "blog_history.json")),
+            history_db=entry.get("history_db", os.path.join(data_dir, "blog_history.sqlite3")),
+            history_backend=entry.get("history_backend"),
+            outbox_dir=entry.get("outbox", os.path.join(data_dir, "outbox")),
+            articles_per_day=None if per_day is None else int(per_day),
+            ledger=TokenLedger(),
+            hedger=Hedger(),
+            catalog_file=catalog_file,
+        ))
+    if not blogs:
+        raise ValueError(f"{path}: aucun blog défini")
+    return blogs
+
+# ---------------- RETENTION ----------------
+# Raw per-day records older than HISTORY_RETENTION_DAYS are folded into
+# "day_rollup" (posts per category), and per-category maps only keep
+# categories that still exist and have something to remember. The title
+# digests are kept forever: they are the dedup memory and cost 8 bytes each.
+def apply_retention(history: dict, today: datetime = None):
+    if HISTORY_RETENTION_DAYS > 0:
+        today = today or datetime.now(timezone.utc)
+        cutoff = (today - timedelta(days=HISTORY_RETENTION_DAYS)).strftime("%Y-%m-%d")
+        rollup = history.setdefault("day_rollup", {})
+        for day in sorted(history.get("days", {})):
+            if day >= cutoff:
+                break
+            for category in history["days"].pop(day):
+                rollup[category] = rollup.get(category, 0) + 1
+        usage = history.get("token_usage", {})
+        for day in [d for d in usage if d < cutoff]:
+            del usage[day]
+
+    # Only ids gone from the catalog are pruned: a name that no spelling in
+    # CATALOG_IDS resolves yet is kept until one does.
+    known = current_catalog().by_key
+    for key in ("category_loops", "recent_articles", "day_rollup", "last_posted"):
+        entries = history.get(key, {})
+        for category in [c for c, v in entries.items() if (c.isdigit() and c not in known) or not v]:
+            del entries[category]
+
+# ---------------- TITLE INDEX ----------------
+# Used titles are stored as the first TITLE_DIGEST_SIZE bytes of their SHA-1,
+# concatenated in sorted order and base64-encoded under "title_hashes".
+# Older files with a "titles" list of hex digests are migrated on load.
+TITLE_DIGEST_SIZE = 8
+
+def title_key(title: str) -> str:
+    return title.strip().lower()
+
+def title_digest(title: str) -> bytes:
+    return hashlib.sha1(title_key(title).encode("utf-8")).digest()[:TITLE_DIGEST_SIZE]
+
+def decode_title_index(packed: str, legacy=()) -> set:
+    raw = base64.b64decode(packed) if packed else b""
+    digests = {raw[i:i + TITLE_DIGEST_SIZE] for i in range(0, len(raw), TITLE_DIGEST_SIZE)}
+    for h in legacy:
+        digests.add(bytes.fromhex(h)[:TITLE_DIGEST_SIZE] if isinstance(h, str) else h)
+    return digests
+
+def encode_title_index(digests) -> str:
+    return base64.b64encode(b"".join(sorted(digests))).decode("ascii")
 
 def title_in_history(title: str, history: dict) -> bool:
-    h = hashlib.sha1(title.strip().lower().encode("utf-8")).hexdigest()
-    return h in history.get("titles", [])
+    return title_digest(title) in history.get("titles", ())
 
 def add_title_to_history(title: str, history: dict):
-    h = hashlib.sha1(title.strip().lower().encode("utf-8")).hexdigest()
-    if "titles" not in history:
-        history["titles"] = []
-    if h not in history["titles"]:
-        history["titles"].append(h)
+    if not hasattr(history.get("titles"), "add"):
+        history["titles"] = decode_title_index("", history.get("titles", ()))
+    history["titles"].add(title_digest(title))
+    if "_near_dup" in history:
+        history["_near_dup"].add(title)
+
+# ---------------- NEAR-DUPLICATE TITLES ----------------
+# Titles are normalized (no emoji, punctuation or accents), cut into
+# character shingles and summarized by a MinHash signature. LSH banding
+# turns the lookup into a few dict probes; candidates are then confirmed
+# with the estimated Jaccard similarity against NEAR_DUP_THRESHOLD.
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+SHINGLE_SIZE = 3
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20250101)
+_MINHASH_PARAMS = [(_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+                   for _ in range(MINHASH_PERMUTATIONS)]
+
+def normalize_title(title: str) -> str:
+    text = unicodedata.normalize("NFKD", title.lower())
+    kept = []
+    for ch in text:
+        cat = unicodedata.category(ch)
+        if cat == "Mn":
+            continue
+        kept.append(" " if cat[0] in "PSCZ" else ch)
+    return " ".join("".join(kept).split())
+
+def title_shingles(title: str) -> set:
+    text = normalize_title(title)
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+def minhash_signature(title: str):
+    shingles = title_shingles(title)
+    if not shingles:
+        return None
+    values = [int.from_bytes(hashlib.blake2b(sh.encode("utf-8"), digest_size=8).digest(), "big")
+              for sh in shingles]
+    return tuple(min((a * v + b) % _MERSENNE_PRIME for v in values) & 0xFFFFFFFF
+                 for a, b in _MINHASH_PARAMS)
+
+def near_dup_path(history_path: str) -> str:
+    return os.path.splitext(history_path)[0] + ".minhash.json"
+
+class NearDupIndex:
+    """MinHash/LSH index of past titles."""
+
+    def __init__(self, threshold: float = NEAR_DUP_THRESHOLD):
+        self.threshold = threshold
+        self.signatures = []
+        self.buckets = {}
+        self.keys = set()
+
+    def _bands(self, sig):
+        rows = MINHASH_PERMUTATIONS // MINHASH_BANDS
+        for band in range(MINHASH_BANDS):
+            yield band, sig[band * rows:(band + 1) * rows]
+
+    def add_signature(self, sig):
+        idx = len(self.signatures)
+        self.signatures.append(sig)
+        for band in self._bands(sig):
+            self.buckets.setdefault(band, []).append(idx)
+
+    def add(self, title: str):
+        self.keys.add(title_key(title))
+        sig = minhash_signature(title)
+        if sig is not None:
+            self.add_signature(sig)
+
+    def similarity(self, title: str) -> float:
+        sig = minhash_signature(title)
+        if sig is None:
+            return 0.0
+        best = 0.0
+        seen = set()
+        for band in self._bands(sig):
+            for idx in self.buckets.get(band, ()):
+                if idx in seen:
+                    continue
+                seen.add(idx)
+                other = self.signatures[idx]
+                same = sum(1 for x, y in zip(sig, other) if x == y)
+                best = max(best, same / MINHASH_PERMUTATIONS)
+        return best
+
+    def contains(self, title: str) -> bool:
+        if title_key(title) in self.keys:
+            return True
+        return self.threshold > 0 and self.similarity(title) >= self.threshold
+
+    def save(self, path: str):
+        # Only the most recent NEAR_DUP_MAX_TITLES signatures are kept.
+        kept = self.signatures[-NEAR_DUP_MAX_TITLES:] if NEAR_DUP_MAX_TITLES > 0 else self.signatures
+        packed = [base64.b64encode(struct.pack(f"<{MINHASH_PERMUTATIONS}I", *sig)).decode("ascii")
+                  for sig in kept]
+        atomic_write_json(path, {"permutations": MINHASH_PERMUTATIONS, "signatures": packed})
+
+def load_near_dup_index(path: str, history: dict) -> NearDupIndex:
+    index = NearDupIndex()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        data = None
+    if data and data.get("permutations") == MINHASH_PERMUTATIONS:
+        for packed in data.get("signatures", []):
+            index.add_signature(struct.unpack(f"<{MINHASH_PERMUTATIONS}I", base64.b64decode(packed)))
+    else:
+        # No usable index yet: seed it with the clear-text titles we still have.
+        for titles in history.get("recent_articles", {}).values():
+            for title in titles:
+                index.add(title)
+    return index
+
+def title_is_taken(title: str, history: dict, reserved: NearDupIndex) -> bool:
+    if title_in_history(title, history) or reserved.contains(title):
+        return True
+    index = history.get("_near_dup")
+    return index is not None and index.contains(title)
+
+# ---------------- HISTORY STORES ----------------
+# A store loads the history dict, records each delivered post and saves the
+# rest at the end of the run. "json" appends events to a journal next to
+# HISTORY_FILE; "sqlite" keeps HISTORY_DB up to date one transaction per post.
+def apply_history_event(history: dict, event: dict):
+    if event["op"] == "post":
+        record_post(history, event["category"], event["title"], event["loop_index"], event["day"])
+    elif event["op"] == "usage":
+        merge_token_usage(history, event["day"], event["usage"])
+        merge_call_latencies(history, event.get("latencies", {}))
+    elif event["op"] == "cat_index":
+        history["cat_index"] = event["value"]
+        if "cursor" in event:
+            history["cat_cursor"] = event["cursor"]
+
+class JsonHistoryStore:
+    """HISTORY_FILE snapshot plus an append-only HISTORY_FILE.journal.
+
+    Every change is appended (and fsynced) as one JSON line with a sequence
+    number. Loading replays the lines newer than the snapshot's
+    "journal_seq"; a torn last line is ignored. Once HISTORY_COMPACT_EVERY
+    events have piled up, the snapshot is rewritten atomically and the
+    journal truncated.
+
+    With keep_loaded (daemon), the loaded history stays in memory and load()
+    returns it again as long as neither file changed since this store last
+    read or wrote them.
+    """
+
+    def __init__(self, path: str, keep_loaded: bool = False):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.pending = 0
+        self.cat_index = None
+        self.keep_loaded = keep_loaded
+        self.loaded = None
+        self.signature = None
+
+    def _signature(self) -> tuple:
+        sig = []
+        for path in (self.path, self.journal_path):
+            try:
+                st = os.stat(path)
+                sig.append((st.st_ino, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                sig.append(None)
+        return tuple(sig)
+
+    def _remember(self, history: dict):
+        if self.keep_loaded:
+            self.loaded = history
+            self.signature = self._signature()
+
+    def forget(self):
+        # Drops the in-memory history, e.g. after a failed run.
+        self.loaded = None
+        self.signature = None
+
+    def _read_journal(self) -> list:
+        try:
+            with open(self.journal_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        events = []
+        good = 0
+        for line in data.splitlines(keepends=True):
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("ligne incomplète")
+                events.append(json.loads(line))
+            except ValueError as e:
+                if good + len(line) < len(data):
+                    raise ValueError(f"Journal illisible: {self.journal_path}: "
+                                     f"ligne {len(events) + 1}: {e}") from e
+                break  # torn last line: a crashed (or still running) append
+            good += len(line)
+        if good < len(data) and holds_history_lock(self.path):
+            # Drop the torn tail so the next append starts on a clean line.
+            # Without the lock it may be an append in progress: left alone.
+            print(f"[WARN] Fin de journal tronquée ignorée: {data[good:good + 80]!r}")
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good)
+        return events
+
+    def load(self) -> dict:
+        if self.loaded is not None and self._signature() == self.signature:
+            return self.loaded
+        history = load_history(self.path)
+        self.seq = history.get("journal_seq", 0)
+        self.pending = 0
+        for event in self._read_journal():
+            if event.get("seq", 0) <= self.seq:
+                continue  # already folded into the snapshot
+            apply_history_event(history, event)
+            self.seq = event["seq"]
+            self.pending += 1
+        migrate_category_keys(history)
+        self.cat_index = history["cat_index"]
+        self._remember(history)
+        return history
+
+    def _append(self, event: dict):
+        self.seq += 1
+        self.pending += 1
+        event["seq"] = self.seq
+        ensure_history_path(self.journal_path)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if self.loaded is not None:
+            self.signature = self._signature()
+
+    def record_post(self, history: dict, category: str, title: str, loop_index: int, day: str):
+        with self.lock:
+            record_post(history, category, title, loop_index, day)
+            self._append({"op": "post", "day": day, "category": category,
+                          "title": title, "loop_index": loop_index})
+
+    def record_usage(self, history: dict, day: str, usage: dict, latencies: dict = None):
+        with self.lock:
+            merge_token_usage(history, day, usage)
+            merge_call_latencies(history, latencies or {})
+            self._append({"op": "usage", "day": day, "usage": usage, "latencies": latencies or {}})
+
+    def save(self, history: dict):
+        with self.lock:
+            if history.get("cat_index", 0) != self.cat_index:
+                self.cat_index = history.get("cat_index", 0)
+                self._append({"op": "cat_index", "value": self.cat_index,
+                              "cursor": history.get("cat_cursor")})
+            if self.pending >= HISTORY_COMPACT_EVERY or not os.path.exists(self.path):
+                self.compact(history)
+
+    def compact(self, history: dict):
+        apply_retention(history)
+        history["journal_seq"] = self.seq
+        save_history(self.path, history)
+        with open(self.journal_path, "w", encoding="utf-8"):
+            pass
+        self.pending = 0
+        if self.loaded is not None:
+            self._remember(history)
+
+    def close(self):
+        pass
+
+class SqliteTitleSet:
+    """Set-like view of the titles table, so lookups never load every hash."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __contains__(self, digest) -> bool:
+        with self.store.lock:
+            row = self.store.db.execute("SELECT 1 FROM titles WHERE hash = ?", (digest,)).fetchone()
+        return row is not None
+
+    def add(self, digest):
+        with self.store.lock:
+            self.store.db.execute("INSERT OR IGNORE INTO titles(hash) VALUES (?)", (digest,))
+
+    def __iter__(self):
+        with self.store.lock:
+            rows = self.store.db.execute("SELECT hash FROM titles").fetchall()
+        return iter(row[0] for row in rows)
+
+    def __len__(self) -> int:
+        with self.store.lock:
+            return self.store.db.execute("SELECT COUNT(*) FROM titles").fetchone()[0]
+
+class SqliteHistoryStore:
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS titles (hash BLOB PRIMARY KEY) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS posts (
+        id INTEGER PRIMARY KEY,
+        day TEXT,
+        category TEXT NOT NULL,
+        title TEXT,
+        loop_index INTEGER
+    );
+    CREATE INDEX IF NOT EXISTS posts_day ON posts(day);
+    CREATE INDEX IF NOT EXISTS posts_category ON posts(category, id);
+    CREATE TABLE IF NOT EXISTS category_loops (category TEXT PRIMARY KEY, loops INTEGER NOT NULL);
+    CREATE TABLE IF NOT EXISTS last_posted (category TEXT PRIMARY KEY, day TEXT NOT NULL);
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    CREATE TABLE IF NOT EXISTS token_usage (
+        day TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        calls INTEGER NOT NULL,
+        prompt INTEGER NOT NULL,
+        output INTEGER NOT NULL,
+        seconds REAL NOT NULL,
+        PRIMARY KEY (day, kind)
+    );
+    """
+    # Only recent days are loaded: the day map is used to avoid posting a
+    # category twice on the same day, not to scan the whole past.
+    DAYS_LOADED = 31
+
+    def __init__(self, path: str, import_from: str = None):
+        ensure_history_path(path)
+        self.path = path
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(self.SCHEMA)
+        if import_from and self._meta("imported_from") is None and os.path.exists(import_from):
+            self._import_json(import_from)
+        if self._meta("category_keys") is None:
+            self._migrate_category_keys()
+
+    def _migrate_category_keys(self):
+        # Rows written before the catalog hold full category names.
+        catalog = current_catalog()
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            for (cat,) in self.db.execute("SELECT DISTINCT category FROM posts").fetchall():
+                key = catalog.resolve(cat)
+                if key and key != cat:
+                    self.db.execute("UPDATE posts SET category = ? WHERE category = ?", (key, cat))
+            loops = {}
+            for cat, n in self.db.execute("SELECT category, loops FROM category_loops").fetchall():
+                key = catalog.resolve(cat) or cat
+                loops[key] = max(loops.get(key, 0), n)
+            self.db.execute("DELETE FROM category_loops")
+            self.db.executemany("INSERT INTO category_loops(category, loops) VALUES (?, ?)",
+                                loops.items())
+            self.db.execute("DELETE FROM last_posted")
+            self.db.execute("INSERT INTO last_posted(category, day)"
+                            " SELECT category, MAX(day) FROM posts WHERE day IS NOT NULL"
+                            " GROUP BY category")
+            self._set_meta("category_keys", 1)
+            self.db.execute("COMMIT")
+
+    def _meta(self, key: str):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value):
+        self.db.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _import_json(self, json_path: str):
+        old = JsonHistoryStore(json_path).load()
+        # The JSON history keeps days and the last 7 titles separately: each
+        # category's titles go to its most recent posts, and titles older
+        # than the retained days become posts without a day.
+        rows = []
+        for category in sorted({c for cats in old["days"].values() for c in cats} | set(old["recent_articles"])):
+            days = sorted(d for d, cats in old["days"].items() for c in cats if c == category)
+            titles = old["recent_articles"].get(category, [])
+            undated = max(0, len(titles) - len(days))
+            titled = [None] * (len(days) - len(titles) + undated) + titles[undated:]
+            rows += [(None, category, t) for t in titles[:undated]]
+            rows += [(d, category, t) for d, t in zip(days, titled)]
+        rows.sort(key=lambda r: (r[0] or "", old["days"][r[0]].index(r[1]) if r[0] else 0))
+        with self.lock:
+            self.db.execute("BEGIN")
+            self.db.executemany("INSERT OR IGNORE INTO titles(hash) VALUES (?)",
+                                ((h,) for h in old["titles"]))
+            self.db.executemany("INSERT INTO posts(day, category, title) VALUES (?, ?, ?)", rows)
+            self.db.executemany("INSERT OR REPLACE INTO category_loops(category, loops) VALUES (?, ?)",
+                                ((c, n) for c, n in old["category_loops"].items() if n))
+            self.db.executemany("INSERT OR REPLACE INTO last_posted(category, day) VALUES (?, ?)",
+                                old.get("last_posted", {}).items())
+            self.db.executemany(
+                "INSERT OR REPLACE INTO token_usage(day, kind, calls, prompt, output, seconds)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [(day, kind, u["calls"], u["prompt"], u["output"], u["seconds"])
+                 for day, kinds in old.get("token_usage", {}).items() for kind, u in kinds.items()])
+            if old.get("call_latencies"):
+                self._set_meta("call_latencies", json.dumps({"call_latencies": old["call_latencies"]}))
+            self._set_meta("day_rollup", json.dumps(old.get("day_rollup", {})))
+            self._set_meta("cat_index", old.get("cat_index", 0))
+            self._set_meta("cat_cursor", old.get("cat_cursor", ""))
+            self._set_meta("category_keys", 1)  # load() already re-keyed the JSON history
+            self._set_meta("imported_from", json_path)
+            self.db.execute("COMMIT")
+        old["_near_dup"].save(near_dup_path(self.path))
+        print(f"[HISTORY] Import de {json_path} dans {self.path}")
+
+    def load(self) -> dict:
+        with self.lock:
+            since = (datetime.now(timezone.utc) - timedelta(days=self.DAYS_LOADED)).strftime("%Y-%m-%d")
+            days = {}
+            for day, category in self.db.execute(
+                    "SELECT day, category FROM posts WHERE day >= ? ORDER BY id", (since,)):
+                days.setdefault(day, []).append(category)
+            loops = dict(self.db.execute("SELECT category, loops FROM category_loops"))
+            last_posted = dict(self.db.execute("SELECT category, day FROM last_posted"))
+            recent = {}
+            for category, title in self.db.execute(
+                    "SELECT category, title FROM ("
+                    " SELECT category, title, ROW_NUMBER() OVER"
+                    "  (PARTITION BY category ORDER BY id DESC) AS rn"
+                    " FROM posts WHERE title IS NOT NULL) WHERE rn <= 7 ORDER BY rn DESC"):
+                recent.setdefault(category, []).append(title)
+            usage = {}
+            for day, kind, calls, prompt, output, seconds in self.db.execute(
+                    "SELECT day, kind, calls, prompt, output, seconds FROM token_usage"
+                    " WHERE day >= ?", (since,)):
+                usage.setdefault(day, {})[kind] = {"calls": calls, "prompt": prompt,
+                                                   "output": output, "seconds": seconds}
+            history = {
+                "titles": SqliteTitleSet(self),
+                "days": days,
+                "cat_index": int(self._meta("cat_index") or 0),
+                "cat_cursor": self._meta("cat_cursor") or None,
+                "category_loops": loops,
+                "last_posted": last_posted,
+                "recent_articles": recent,
+                "day_rollup": json.loads(self._meta("day_rollup") or "{}"),
+                "token_usage": usage,
+                "call_latencies": json.loads(self._meta("call_latencies") or "{}").get("call_latencies", {}),
+            }
+        history["_near_dup"] = load_near_dup_index(near_dup_path(self.path), history)
+        return history
+
+    def record_post(self, history: dict, category: str, title: str, loop_index: int, day: str):
+        with self.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                record_post(history, category, title, loop_index, day)
+                self.db.execute("INSERT INTO posts(day, category, title, loop_index) VALUES (?, ?, ?, ?)",
+                                (day, category, title, loop_index))
+                self.db.execute("INSERT OR REPLACE INTO category_loops(category, loops) VALUES (?, ?)",
+                                (category, loop_index + 1))
+                self.db.execute("INSERT OR REPLACE INTO last_posted(category, day) VALUES (?, ?)",
+                                (category, day))
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+
+    def record_usage(self, history: dict, day: str, usage: dict, latencies: dict = None):
+        with self.lock:
+            merge_token_usage(history, day, usage)
+            self.db.execute("BEGIN IMMEDIATE")
+            # Merged with what other runs stored since this history was loaded.
+            stored = json.loads(self._meta("call_latencies") or "{}")
+            merge_call_latencies(stored, latencies or {})
+            history["call_latencies"] = stored["call_latencies"] if stored else {}
+            self._set_meta("call_latencies", json.dumps(stored))
+            self.db.executemany(
+                "INSERT INTO token_usage(day, kind, calls, prompt, output, seconds)"
+                " VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(day, kind) DO UPDATE SET"
+                " calls = calls + excluded.calls, prompt = prompt + excluded.prompt,"
+                " output = output + excluded.output, seconds = seconds + excluded.seconds",
+                [(day, kind, u["calls"], u["prompt"], u["output"], u["seconds"])
+                 for kind, u in usage.items()])
+            self.db.execute("COMMIT")
+
+    def save(self, history: dict):
+        with self.lock:
+            self._set_meta("cat_index", history.get("cat_index", 0))
+            self._set_meta("cat_cursor", history.get("cat_cursor") or "")
+        history["_near_dup"].save(near_dup_path(self.path))
+
+    def forget(self):
+        pass  # every load reads the database
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+def open_history_store(keep_loaded: bool = False):
+    blog = current_blog()
+    if blog.history_backend == "sqlite":
+        return SqliteHistoryStore(blog.history_db, import_from=blog.history_file)
+    return JsonHistoryStore(blog.history_file, keep_loaded=keep_loaded)
+
+def open_history_reader():
+    # For stats, preview and dry-run: creates nothing on disk (a SQLite
+    # history not created yet is read from the JSON file it would import).
+    blog = current_blog()
+    if blog.history_backend == "sqlite" and os.path.exists(blog.history_db):
+        return SqliteHistoryStore(blog.history_db)
+    return JsonHistoryStore(blog.history_file)
+
+def acquire_history_store():
+    # The daemon keeps each blog's store open between runs (Blog.warm_store).
+    store = current_blog().warm_store
+    return store if store is not None else open_history_store()
+
+def release_history_store(store, failed: bool = False):
+    if store is not current_blog().warm_store:
+        store.close()
+    elif failed:
+        store.forget()  # the history on disk is the reference
+
+# ---------------- COORDINATION ----------------
+# Several runs (a manual dispatch next to the scheduled one, or several
+# runners sharing the data directory) can work on the same blog:
+# - history_lock() is an OS file lock held only while the history is
+#   loaded, changed and saved, so no run overwrites another's updates;
+# - LeaseStore hands out expiring claims on categories ("cat:<key>") and
+#   outbox items ("item:<id>"), so no category is generated twice and no
+#   item is mailed twice. Generation and delivery run outside the lock.
+def history_lock_path(history_file: str) -> str:
+    return history_file + ".lock"
+
+def lease_path(history_file: str) -> str:
+    return os.path.splitext(history_file)[0] + ".leases.sqlite3"
+
+def _lock_file(f):
+    try:
+        import fcntl
+    except ImportError:  # Windows
+        import msvcrt
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue  # LK_LOCK gives up after ~10 s
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+def _unlock_file(f):
+    try:
+        import fcntl
+    except ImportError:
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        return
+    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+_HELD_LOCKS = set()
+
+@contextlib.contextmanager
+def history_lock(history_file: str):
+    # Released by the OS if the process dies while holding it.
+    path = history_lock_path(history_file)
+    ensure_history_path(path)
+    with open(path, "a+b") as f:
+        with METRICS.stage("lock_wait"):
+            _lock_file(f)
+        _HELD_LOCKS.add(path)
+        try:
+            yield
+        finally:
+            _HELD_LOCKS.discard(path)
+            _unlock_file(f)
+
+def holds_history_lock(history_file: str) -> bool:
+    return history_lock_path(history_file) in _HELD_LOCKS
+
+class LeaseStore:
+    """Expiring claims on named resources, shared through a SQLite file.
+
+    A resource belongs to the owner whose lease has not expired. A heartbeat
+    thread renews this owner's leases every LEASE_TTL_S / 3 and close()
+    releases them; the leases of a run that died expire on their own.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS leases (
+        resource TEXT PRIMARY KEY,
+        owner TEXT NOT NULL,
+        expires REAL NOT NULL
+    ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str, ttl: float = None):
+        ensure_history_path(path)
+        self.ttl = LEASE_TTL_S if ttl is None else ttl
+        self.owner = f"{os.getpid()}-{os.urandom(4).hex()}"
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(self.SCHEMA)
+        self.stopping = threading.Event()
+        self.heartbeat = threading.Thread(target=self._renew_loop, daemon=True)
+        self.heartbeat.start()
+
+    def claim(self, resource: str) -> bool:
+        now = time.time()
+        with self.lock:
+            cur = self.db.execute(
+                "INSERT INTO leases(resource, owner, expires) VALUES (?, ?, ?)"
+                " ON CONFLICT(resource) DO UPDATE SET owner = excluded.owner,"
+                " expires = excluded.expires"
+                " WHERE leases.owner = excluded.owner OR leases.expires <= ?",
+                (resource, self.owner, now + self.ttl, now))
+        return cur.rowcount > 0
+
+    def owns(self, resource: str) -> bool:
+        with self.lock:
+            row = self.db.execute("SELECT owner, expires FROM leases WHERE resource = ?",
+                                  (resource,)).fetchone()
+        return row is not None and row[0] == self.owner and row[1] > time.time()
+
+    def held_by_others(self, prefix: str) -> set:
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT resource FROM leases WHERE owner != ? AND expires > ?"
+                " AND substr(resource, 1, ?) = ?",
+                (self.owner, time.time(), len(prefix), prefix)).fetchall()
+        return {row[0][len(prefix):] for row in rows}
+
+    def release(self, resource: str):
+        with self.lock:
+            self.db.execute("DELETE FROM leases WHERE resource = ? AND owner = ?",
+                            (resource, self.owner))
+
+    def renew(self):
+        now = time.time()
+        with self.lock:
+            self.db.execute("UPDATE leases SET expires = ? WHERE owner = ? AND expires > ?",
+                            (now + self.ttl, self.owner, now))
+
+    def _renew_loop(self):
+        while not self.stopping.wait(self.ttl / 3):
+            try:
+                self.renew()
+            except sqlite3.Error as e:
+                print(f"[WARN] Renouvellement des baux échoué: {e}")
+
+    def close(self):
+        self.stopping.set()
+        self.heartbeat.join()
+        with self.lock:
+            self.db.execute("DELETE FROM leases WHERE owner = ?", (self.owner,))
+            self.db.close()
 
 # ---------------- MAIL ----------------
+class SmtpSession:
+    """One authenticated SMTP_SSL connection, reopened when the server drops it."""
+
+    def __init__(self, host: str, port: int, user: str, password: str, use_ssl: bool = True):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_ssl = use_ssl
+        self.server = None
+
+    def connect(self):
+        import ssl
+        import smtplib
+        if self.use_ssl:
+            context = ssl.create_default_context()
+            self.server = smtplib.SMTP_SSL(self.host, self.port, context=context)
+        else:
+            self.server = smtplib.SMTP(self.host, self.port)
+        self.server.login(self.user, self.password)
+
+    def send(self, from_addr: str, to_addr: str, message: str):
+        import smtplib
+        if self.server is None:
+            self.connect()
+        try:
+            self.server.sendmail(from_addr, to_addr, message)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # Idle sessions get closed by Gmail: reconnect once and resend.
+            self.close()
+            self.connect()
+            self.server.sendmail(from_addr, to_addr, message)
+
+    def close(self):
+        import smtplib
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self.server = None
+
+class SmtpPool:
+    """Up to `size` reusable sessions shared by all threads of the run."""
+
+    def __init__(self, host: str, port: int, user: str, password: str, size: int = 1,
+                 use_ssl: bool = True):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.size = max(1, size)
+        self.use_ssl = use_ssl
+        self.idle = queue.Queue()
+        self.created = 0
+        self.lock = threading.Lock()
+        self.latencies = []
+
+    def acquire(self) -> SmtpSession:
+        with self.lock:
+            if self.idle.empty() and self.created < self.size:
+                self.created += 1
+                return SmtpSession(self.host, self.port, self.user, self.password, self.use_ssl)
+        return self.idle.get()
+
+    def release(self, session: SmtpSession):
+        self.idle.put(session)
+
+    def send(self, from_addr: str, to_addr: str, message: str) -> float:
+        session = self.acquire()
+        try:
+            start = time.perf_counter()
+            session.send(from_addr, to_addr, message)
+            elapsed = time.perf_counter() - start
+        except Exception:
+            session.close()
+            raise
+        finally:
+            self.release(session)
+        with self.lock:
+            self.latencies.append(elapsed)
+        return elapsed
+
+    def latency_summary(self) -> str:
+        with self.lock:
+            lat = list(self.latencies)
+        if not lat:
+            return "0 message"
+        return (f"{len(lat)} message(s), moy {sum(lat) / len(lat) * 1000:.0f} ms, "
+                f"max {max(lat) * 1000:.0f} ms")
+
+    def disconnect(self):
+        # Closes the idle connections but keeps their sessions, which
+        # reconnect on their next send (the daemon, between tasks).
+        with self.lock:
+            sessions = []
+            while not self.idle.empty():
+                sessions.append(self.idle.get_nowait())
+        for session in sessions:
+            session.close()
+            self.idle.put(session)
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get_nowait().close()
+
+SMTP_POOL = None
+_smtp_pool_lock = threading.Lock()
+
+def get_smtp_pool() -> SmtpPool:
+    global SMTP_POOL
+    with _smtp_pool_lock:
+        if SMTP_POOL is None:
+            SMTP_POOL = SmtpPool(SMTP_HOST, SMTP_PORT, require_env("GMAIL_USER"),
+                                 require_env("GMAIL_PASS"), SMTP_POOL_SIZE, SMTP_SSL)
+            atexit.register(SMTP_POOL.close)
+    return SMTP_POOL
+
+@timed_stage("mail")
 def mail_post(subject, html_body):
-    msg = MIMEMultipart("alternative")
-    msg["Subject"] = subject
-    msg["From"] = GMAIL_USER
-    msg["To"] = BLOGGER_MAIL
-    msg.attach(MIMEText(html_body, "html"))
-    context = ssl.create_default_context()
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465, context=context) as server:
-        server.login(GMAIL_USER, GMAIL_PASS)
-        server.sendmail(GMAIL_USER, BLOGGER_MAIL, msg.as_string())
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    gmail_user = require_env("GMAIL_USER")
+    blogger_mail = current_blog().mail
+    with METRICS.stage("mime_build"):
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = subject
+        msg["From"] = gmail_user
+        msg["To"] = blogger_mail
+        msg.attach(MIMEText(html_body, "html"))
+        message = msg.as_string()
+    METRICS.observe("mail_bytes", len(message))
+    return get_smtp_pool().send(gmail_user, blogger_mail, message)
+
+# ---------------- TOKEN ACCOUNTING ----------------
+# Every model call adds its usage_metadata token counts and duration to
+# the blog's ledger (TOKEN_LEDGER by default) under a kind ("title",
+# "title_batch", "article"). At the end of the run the ledger is merged
+# into history["token_usage"][day], which the planner uses both for what
+# today already spent and for per-call estimates. The ledger also enforces the run's remaining budget: once it
+# is used up, further calls raise BudgetExceededError instead of overrunning.
+class BudgetExceededError(RuntimeError):
+    pass
+
+def usage_cost(prompt_tokens: float, output_tokens: float) -> float:
+    return (prompt_tokens * PRICE_INPUT_PER_MTOK + output_tokens * PRICE_OUTPUT_PER_MTOK) / 1e6
+
+def merge_token_usage(history: dict, day: str, usage: dict):
+    per_day = history.setdefault("token_usage", {}).setdefault(day, {})
+    for kind, u in usage.items():
+        row = per_day.setdefault(kind, {"calls": 0, "prompt": 0, "output": 0, "seconds": 0.0})
+        for field in ("calls", "prompt", "output", "seconds"):
+            row[field] += u[field]
+        row["seconds"] = round(row["seconds"], 3)
+
+def merge_call_latencies(history: dict, latencies: dict):
+    # Keeps the last LATENCY_SAMPLES call durations per kind.
+    if not latencies:
+        return
+    per_kind = history.setdefault("call_latencies", {})
+    for kind, samples in latencies.items():
+        per_kind[kind] = (per_kind.get(kind, []) + list(samples))[-LATENCY_SAMPLES:]
+
+def usage_totals(usage: dict) -> tuple:
+    # (tokens, cost) of a {kind: row} map.
+    prompt = sum(u["prompt"] for u in usage.values())
+    output = sum(u["output"] for u in usage.values())
+    return prompt + output, usage_cost(prompt, output)
+
+class TokenLedger:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self, token_limit: int = 0, cost_limit: float = 0.0, deadline: float = 0.0):
+        with self.lock:
+            self.usage = {}
+            self.latencies = {}
+            self.token_limit = token_limit
+            self.cost_limit = cost_limit
+            self.deadline = deadline
+
+    def check(self):
+        if self.deadline and time.monotonic() >= self.deadline:
+            raise BudgetExceededError("budget de temps du run épuisé")
+        with self.lock:
+            tokens, cost = usage_totals(self.usage)
+        if self.token_limit and tokens >= self.token_limit:
+            raise BudgetExceededError(f"budget de tokens épuisé ({tokens})")
+        if self.cost_limit and cost >= self.cost_limit:
+            raise BudgetExceededError(f"budget de coût épuisé ({cost:.4f} $)")
+
+    def record(self, kind: str, prompt_tokens: int, output_tokens: int, seconds: float):
+        with self.lock:
+            row = self.usage.setdefault(kind, {"calls": 0, "prompt": 0, "output": 0, "seconds": 0.0})
+            row["calls"] += 1
+            row["prompt"] += prompt_tokens
+            row["output"] += output_tokens
+            row["seconds"] += seconds
+            self.latencies.setdefault(kind, []).append(round(seconds, 3))
+        METRICS.count("tokens_prompt", prompt_tokens)
+        METRICS.count("tokens_output", output_tokens)
+
+    def sample(self, kind: str, value: float):
+        # Saved with the call latencies (e.g. "hedged": 1 or 0 per article call).
+        with self.lock:
+            self.latencies.setdefault(kind, []).append(value)
+
+    def summary(self) -> str:
+        with self.lock:
+            usage = {kind: dict(u) for kind, u in self.usage.items()}
+        tokens, cost = usage_totals(usage)
+        calls = sum(u["calls"] for u in usage.values())
+        return f"{calls} appel(s), {tokens} tokens, {cost:.4f} $"
+
+TOKEN_LEDGER = TokenLedger()
+
+def response_usage(response, prompt: str, text: str) -> tuple:
+    # (prompt tokens, output tokens) from usage_metadata, or a rough
+    # 4-characters-per-token estimate when the response has none.
+    meta = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(meta, "prompt_token_count", None)
+    output_tokens = getattr(meta, "candidates_token_count", None)
+    if prompt_tokens is None:
+        prompt_tokens = len(prompt) // 4
+    if output_tokens is None:
+        output_tokens = len(text) // 4
+    return prompt_tokens, output_tokens
+
+# ---------------- MODEL LIMITER ----------------
+# Every model call of the process goes through MODEL_LIMITER:
+# - a requests-per-minute and a tokens-per-minute token bucket (GEMINI_RPM,
+#   GEMINI_TPM). Tokens are reserved from an estimate before the call and
+#   settled with the real usage after it;
+# - an AIMD concurrency limit: +1/limit per success up to
+#   GEMINI_MAX_CONCURRENCY, halved (at most once per GEMINI_BACKOFF seconds)
+#   on 429/503;
+# - retries of quota and transient errors with full-jitter exponential
+#   backoff (GEMINI_RETRIES, GEMINI_BACKOFF, GEMINI_BACKOFF_MAX).
+# Throughput then settles just under the quota instead of failing.
+OVERLOAD_STATUS = {429, 503}
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+ERROR_STATUS_BY_NAME = {
+    "ResourceExhausted": 429,
+    "TooManyRequests": 429,
+    "ServiceUnavailable": 503,
+    "InternalServerError": 500,
+    "BadGateway": 502,
+    "DeadlineExceeded": 504,
+    "GatewayTimeout": 504,
+}
+
+def error_status(e: Exception) -> int:
+    # google.api_core errors carry the HTTP status in `code`.
+    code = getattr(e, "code", None)
+    if isinstance(code, int):
+        return code
+    return ERROR_STATUS_BY_NAME.get(type(e).__name__, 0)
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, n: float):
+        # A request larger than the bucket waits for a full bucket.
+        n = min(n, self.capacity)
+        while True:
+            with self.lock:
+                self._refill()
+                if self.level >= n:
+                    self.level -= n
+                    return
+                wait = (n - self.level) / self.rate
+            time.sleep(wait)
+
+    def adjust(self, n: float):
+        # Settles an estimate; the level may go negative (debt).
+        with self.lock:
+            self._refill()
+            self.level = min(self.capacity, self.level - n)
+
+class AimdLimit:
+    def __init__(self, maximum: int, cooldown: float):
+        self.maximum = max(1, maximum)
+        self.limit = float(self.maximum)
+        self.cooldown = cooldown
+        self.inflight = 0
+        self.last_cut = 0.0
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        with self.cond:
+            while self.inflight >= int(self.limit):
+                self.cond.wait()
+            self.inflight += 1
+
+    def release(self, overloaded: bool = False, succeeded: bool = False):
+        with self.cond:
+            self.inflight -= 1
+            if overloaded:
+                now = time.monotonic()
+                if now - self.last_cut >= self.cooldown:
+                    self.limit = max(1.0, self.limit / 2)
+                    self.last_cut = now
+            elif succeeded:
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            self.cond.notify_all()
+
+class ModelLimiter:
+    def __init__(self, rpm: float = 0, tpm: float = 0, max_concurrency: int = 8,
+                 retries: int = 5, backoff: float = 2.0, backoff_max: float = 60.0):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.concurrency = AimdLimit(max_concurrency, backoff)
+        self.retries = retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+
+    def call(self, func, tokens_estimate: float = 0, can_retry=None):
+        # Runs func() within the limits and retries quota/transient errors
+        # while can_retry() allows it (e.g. nothing streamed out yet).
+        attempt = 0
+        while True:
+            with METRICS.stage("model_wait"):
+                if self.requests is not None:
+                    self.requests.acquire(1)
+                if self.tokens is not None:
+                    self.tokens.acquire(tokens_estimate)
+                self.concurrency.acquire()
+            try:
+                result = func()
+            except Exception as e:
+                status = error_status(e)
+                overloaded = status in OVERLOAD_STATUS
+                self.concurrency.release(overloaded=overloaded)
+                if self.tokens is not None:
+                    self.tokens.adjust(-tokens_estimate)  # the next attempt reserves again
+                retryable = status in RETRYABLE_STATUS or isinstance(e, (ConnectionError, TimeoutError))
+                if not retryable or attempt >= self.retries or (can_retry and not can_retry()):
+                    raise
+                if overloaded:
+                    METRICS.count("model_overloads")
+                METRICS.count("model_retries")
+                delay = random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+                attempt += 1
+                print(f"[RETRY] Gemini {status or type(e).__name__} ({attempt}/{self.retries}), "
+                      f"nouvel essai dans {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            self.concurrency.release(succeeded=True)
+            return result
+
+    def settle(self, tokens_estimate: float, tokens_used: float):
+        if self.tokens is not None:
+            self.tokens.adjust(tokens_used - tokens_estimate)
+
+MODEL_LIMITER = ModelLimiter(GEMINI_RPM, GEMINI_TPM, GEMINI_MAX_CONCURRENCY,
+                             GEMINI_RETRIES, GEMINI_BACKOFF, GEMINI_BACKOFF_MAX)
+
+# ---------------- GEMINI CACHE ----------------
+class GeminiCache:
+    """Content-addressed response cache with TTL and size-bounded LRU eviction."""
+
+    def __init__(self, folder: str, max_bytes: int, ttl_seconds: float):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.size = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model: str, prompt: str, config: dict) -> str:
+        payload = json.dumps({"model": model, "prompt": prompt, "config": config},
+                             ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, key[:2], key + ".json")
+
+    def _entries(self):
+        for root, _, files in os.walk(self.folder):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    yield st.st_mtime, st.st_size, path
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+        if entry is not None and time.time() - entry.get("created", 0) > self.ttl_seconds:
+            entry = None
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        try:
+            os.utime(path)  # mtime is the LRU clock
+        except OSError:
+            pass
+        return entry["text"]
+
+    def put(self, key: str, text: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"created": time.time(), "text": text}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        with self.lock:
+            if self.size is None:
+                self.size = sum(size for _, size, _ in self._entries())
+            else:
+                self.size += os.path.getsize(path)
+            if self.size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Drops expired entries, then least recently used ones, down to 90%.
+        now = time.time()
+        entries = sorted(self._entries())
+        self.size = sum(size for _, size, _ in entries)
+        for mtime, size, path in entries:
+            if self.size <= self.max_bytes * 0.9 and now - mtime <= self.ttl_seconds:
+                continue
+            try:
+                os.remove(path)
+                self.size -= size
+            except OSError:
+                pass
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        return f"{self.hits}/{total} hits ({rate:.0f}%)"
+
+GEMINI_RESPONSE_CACHE = (GeminiCache(GEMINI_CACHE_DIR, int(GEMINI_CACHE_MAX_MB * 1024 * 1024),
+                                     GEMINI_CACHE_TTL_HOURS * 3600)
+                         if GEMINI_CACHE else None)
+
+def generate_text(prompt: str, cache_salt: str = "", stream_to=None, usage_kind: str = "other",
+                  **config) -> str:
+    # Single entry point for model calls. `cache_salt` separates otherwise
+    # identical prompts whose answers must differ (e.g. title retries).
+    # With `stream_to`, the response is streamed into that consumer's feed()
+    # and the result of its finish() is returned (and cached). Token usage
+    # is recorded in the blog's ledger under `usage_kind`; cache hits are free.
+    cache = GEMINI_RESPONSE_CACHE
+    key = None
+    if cache is not None:
+        key = cache.key(MODEL, prompt, dict(config, salt=cache_salt, stream=stream_to is not None))
+        text = cache.get(key)
+        if text is not None:
+            return text
+    ledger = current_blog().ledger
+    ledger.check()
+    streamed = []
+    timing = {}
+
+    def attempt():
+        model = get_model()
+        timing["start"] = time.perf_counter()
+        if stream_to is None:
+            response = model.generate_content(prompt, **config)
+            return response, response.text.strip()
+        response = model.generate_content(prompt, stream=True, **config)
+        for chunk in response:
+            streamed.append(True)
+            stream_to.feed(chunk.text)
+        return response, stream_to.finish()
+
+    estimate = len(prompt) // 4 + DEFAULT_CALL_ESTIMATES.get(usage_kind, {}).get("output", 0)
+    response, text = MODEL_LIMITER.call(attempt, estimate, can_retry=lambda: not streamed)
+    prompt_tokens, output_tokens = response_usage(response, prompt, text)
+    MODEL_LIMITER.settle(estimate, prompt_tokens + output_tokens)
+    ledger.record(usage_kind, prompt_tokens, output_tokens, time.perf_counter() - timing["start"])
+    if cache is not None:
+        cache.put(key, text)
+    return text
+
+# ---------------- ARTICLE STREAMING ----------------
+class ArticleContractError(ValueError):
+    pass
+
+class StreamCancelled(Exception):
+    pass
+
+FENCE_OPEN_RE = re.compile(r"```[\w+-]*")
+
+MARKDOWN_RE = re.compile(r"^\s*#{1,6}\s|\*\*", re.M)
+
+class ArticleStream:
+    """Strips the ``` fences (any language tag) and checks the article body while it streams.
+
+    Raises ArticleContractError (which ends the stream) as soon as the
+    output does not open with an HTML tag, shows Markdown before its first
+    <h2>, or has no <h2> within its first H2_WINDOW characters, and
+    StreamCancelled once the optional `cancel` event is set.
+    """
+
+    H2_WINDOW = 6000
+
+    def __init__(self, cancel: threading.Event = None):
+        self.parts = []
+        self.head = ""
+        self.head_done = False
+        self.intro = ""
+        self.has_h2 = False
+        self.cancel = cancel
+
+    def feed(self, text: str):
+        if self.cancel is not None and self.cancel.is_set():
+            raise StreamCancelled("requête doublée plus rapide")
+        if self.head_done:
+            self.parts.append(text)
+            self._check_intro(text)
+            return
+        self.head += text
+        self._check_head()
+
+    def _check_intro(self, text: str):
+        # Only the text before the first <h2> is kept and checked.
+        if self.has_h2:
+            return
+        self.intro += text
+        cut = self.intro.lower().find("<h2")
+        if cut >= 0:
+            self.has_h2 = True
+        intro = self.intro if cut < 0 else self.intro[:cut]
+        markdown = MARKDOWN_RE.search(intro)
+        if markdown:
+            raise ArticleContractError(f"Markdown dans l'introduction: {intro[markdown.start():][:60]!r}")
+        if not self.has_h2 and len(self.intro) > self.H2_WINDOW:
+            raise ArticleContractError(f"aucune section <h2> dans les {self.H2_WINDOW} premiers caractères")
+
+    def _check_head(self):
+        head = self.head.lstrip()
+        if head.startswith("```"):
+            rest = head[FENCE_OPEN_RE.match(head).end():]
+            if not rest.strip():
+                return  # fence or its language tag not complete yet
+            head = rest.lstrip()
+        elif "```".startswith(head):
+            return
+        if not head:
+            return
+        if not head.startswith("<"):
+            raise ArticleContractError(f"le corps ne commence pas par du HTML: {head[:60]!r}")
+        self.parts.append(head)
+        self.head_done = True
+        self._check_intro(head)
+
+    def finish(self) -> str:
+        if not self.head_done:
+            raise ArticleContractError(f"article incomplet: {self.head[:60]!r}")
+        html = "".join(self.parts).rstrip()
+        if html.endswith("```"):
+            html = html[:-3].rstrip()
+        if not H2_RE.search(html):
+            raise ArticleContractError("aucune section <h2> dans l'article")
+        return html
+
+# ---------------- ARTICLE ASSEMBLY ----------------
+# The model only writes the body. The meta paragraph, the H1 and the table
+# of contents are built here: every H2 gets an id slugged from its text
+# (unique within the article), the TOC links to them, and the tip/warning
+# boxes get one canonical class whatever the model called them.
+H2_RE = re.compile(r"<h2\b([^>]*)>(.*?)</h2\s*>", re.S | re.I)
+ECHOED_HEAD_RE = re.compile(
+    r"""<p\s+class=["']meta["'][^>]*>.*?</p\s*>|<h1\b[^>]*>.*?</h1\s*>|<nav\s+id=["']toc["'][^>]*>.*?</nav\s*>""",
+    re.S | re.I)
+ID_ATTR_RE = re.compile(r"""\s+id\s*=\s*("[^"]*"|'[^']*'|[^\s>]+)""", re.I)
+TAG_RE = re.compile(r"<[^>]+>")
+BLOCKQUOTE_RE = re.compile(r"""<blockquote\s+class\s*=\s*["']([^"']*)["']\s*>""", re.I)
+CALLOUT_CLASSES = {
+    "tip": "tip", "conseil": "tip", "astuce": "tip", "info": "tip", "note": "tip",
+    "warning": "warning", "alerte": "warning", "attention": "warning",
+    "avertissement": "warning", "danger": "warning",
+}
+
+def slugify(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "section"
+
+def normalize_callouts(body: str) -> str:
+    def canonical(m):
+        classes = m.group(1).lower().split()
+        kind = next((CALLOUT_CLASSES[c] for c in classes if c in CALLOUT_CLASSES), None)
+        return f'<blockquote class="{kind}">' if kind else m.group(0)
+    return BLOCKQUOTE_RE.sub(canonical, body)
+
+def assemble_article(title: str, meta_desc: str, body: str) -> str:
+    body = body.strip()
+    if body.startswith("```"):
+        body = body[FENCE_OPEN_RE.match(body).end():]
+    if body.endswith("```"):
+        body = body[:-3]
+    body = ECHOED_HEAD_RE.sub("", body).strip()
+
+    toc = []
+    used = set()
+
+    def anchor(m):
+        text = " ".join(html_unescape(TAG_RE.sub("", m.group(2))).split())
+        slug = base = slugify(text)
+        n = 2
+        while slug in used:
+            slug = f"{base}-{n}"
+            n += 1
+        used.add(slug)
+        toc.append(f"<li><a href='#{slug}'>{html_escape(text, quote=False)}</a></li>")
+        return f"<h2 id='{slug}'{ID_ATTR_RE.sub('', m.group(1))}>{m.group(2)}</h2>"
+
+    body = normalize_callouts(H2_RE.sub(anchor, body))
+    parts = [f"<p class='meta'>{html_escape(meta_desc, quote=False)}</p>",
+             f"<h1>{html_escape(title, quote=False)}</h1>"]
+    if toc:
+        parts.append("<nav id='toc'>\n<ul>\n" + "\n".join(toc) + "\n</ul>\n</nav>")
+    parts.append(body)
+    return "\n\n".join(parts)
+
+# ---------------- HEDGED CALLS ----------------
+# An article call still running after the blog's hedge delay (the
+# HEDGE_PERCENTILE of its recorded article latencies) gets a second,
+# identical request; the first valid result wins and the other is
+# cancelled. A streamed loser stops at its next chunk; a non-streamed one
+# cannot be interrupted and its result is dropped. Whether each article
+# call was hedged is saved with the call latencies ("hedged" samples), so
+# the HEDGE_MAX_RATE cap holds over the blog's last LATENCY_SAMPLES article
+# calls, across runs, rather than restarting from zero in each run.
+def hedge_delay(history: dict) -> float:
+    samples = sorted(history.get("call_latencies", {}).get("article", []))
+    if not HEDGE_ARTICLES or len(samples) < HEDGE_MIN_SAMPLES:
+        return 0.0
+    idx = min(len(samples) - 1, int(round(HEDGE_PERCENTILE / 100 * (len(samples) - 1))))
+    return samples[idx]
+
+class Hedger:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self, delay: float = 0.0, hedged: list = ()):
+        # `hedged`: 1/0 per recent article call, oldest first.
+        with self.lock:
+            self.delay = delay
+            self.window = list(hedged)[-LATENCY_SAMPLES:]
+            self.inflight = 0
+
+    def _take_hedge(self) -> bool:
+        with self.lock:
+            if sum(self.window) + self.inflight + 1 <= HEDGE_MAX_RATE * LATENCY_SAMPLES:
+                self.inflight += 1
+                return True
+            return False
+
+    def _done(self, hedged: bool):
+        with self.lock:
+            self.window = (self.window + [int(hedged)])[-LATENCY_SAMPLES:]
+            if hedged:
+                self.inflight -= 1
+        current_blog().ledger.sample("hedged", int(hedged))
+
+    def run(self, call):
+        # call(cancel_event) -> result, run once or twice concurrently.
+        with self.lock:
+            delay = self.delay
+        if not delay:
+            return call(None)
+        cancels = [threading.Event(), threading.Event()]
+        results = queue.Queue()
+
+        def attempt(i):
+            try:
+                results.put((i, call(cancels[i]), None))
+            except BaseException as e:
+                results.put((i, None, e))
+
+        def start(i):
+            threading.Thread(target=contextvars.copy_context().run, args=(attempt, i),
+                             daemon=True).start()
+
+        start(0)
+        running = 1
+        try:
+            outcome = results.get(timeout=delay)
+        except queue.Empty:
+            if self._take_hedge():
+                METRICS.count("hedges")
+                print(f"[HEDGE] Article toujours en cours après {delay:.1f}s, requête doublée")
+                start(1)
+                running = 2
+            outcome = results.get()
+        self._done(running == 2)
+        running -= 1
+        while outcome[2] is not None and running:
+            outcome = results.get()  # the first to finish failed: wait for the other
+            running -= 1
+        winner, value, error = outcome
+        for cancel in cancels:
+            cancel.set()
+        if error is not None:
+            raise error
+        if winner == 1:
+            METRICS.count("hedge_wins")
+        return value
+
+HEDGER = Hedger()
 
 # ---------------- AI PROMPTS ----------------
-def gen_punchy_title_and_meta(category: str, loop_index: int = 0, recent_titles: list = None):
+@timed_stage("title")
+def gen_punchy_title_and_meta(category: str, loop_index: int = 0, recent_titles: list = None,
+                              attempt: int = 0):
     recent_text = ""
     if recent_titles:
         recent_text = "Évite les angles, formulations ou titres déjà utilisés récemment:\n" + \
@@ -942,8 +2132,8 @@ C'est la {loop_index+1}ᵉ fois que nous écrivons sur cette catégorie.
 Renvoie STRICTEMENT au format JSON:
 {{"title": "...", "meta": "..."}}
 """
-    model = genai.GenerativeModel(MODEL)
-    out = model.generate_content(prompt).text.strip()
+    out = generate_text(prompt, cache_salt=str(attempt), usage_kind="title")
+    METRICS.observe("response_chars", len(out), stage="title")
     import re, json as pyjson
     m = re.search(r'\{.*\}', out, re.S)
     if not m:
@@ -958,6 +2148,56 @@ Renvoie STRICTEMENT au format JSON:
     except Exception:
         return ("✨ " + category.split("–")[0].strip(), "Découvrez nos conseils essentiels.")
 
+@timed_stage("title_batch")
+def gen_title_candidates(requests: list, n: int) -> dict:
+    # One call returning `n` title/meta pairs for each (category, loop_index,
+    # recent_titles) request. Result maps request position -> [(title, meta)].
+    blocks = []
+    for i, (category, loop_index, recent_titles) in enumerate(requests):
+        block = f"- [{i}] {category} (article n°{loop_index+1} sur cette catégorie)"
+        if recent_titles:
+            block += "\n  Déjà utilisés, à éviter:\n" + "\n".join(f"  * {t}" for t in recent_titles)
+        blocks.append(block)
+    categories_text = "\n".join(blocks)
+
+    prompt = f"""
+Tu es un rédacteur SEO en 2025. Pour CHAQUE catégorie ci-dessous, propose {n} candidates
+DIFFÉRENTES: un titre percutant et “clickbait” en français (max 70 caractères),
+commençant par UN seul emoji, et une méta description unique et courte
+(max 250 caractères) qui se termine par un point.
+Varie les angles d'une candidate à l'autre.
+
+Catégories:
+{categories_text}
+
+Renvoie STRICTEMENT au format JSON, une clé par numéro de catégorie:
+{{"0": [{{"title": "...", "meta": "..."}}], "1": [...]}}
+"""
+    out = generate_text(prompt, usage_kind="title_batch")
+    METRICS.observe("response_chars", len(out), stage="title_batch")
+    m = re.search(r'\{.*\}', out, re.S)
+    if not m:
+        return {}
+    try:
+        data = json.loads(m.group(0))
+    except ValueError:
+        return {}
+    result = {}
+    for key, entries in data.items():
+        if not str(key).isdigit() or not isinstance(entries, list):
+            continue
+        pairs = []
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            title = str(entry.get("title", "")).strip().strip('"')
+            meta = str(entry.get("meta", "")).strip()[:250]
+            if title:
+                pairs.append((title, meta))
+        result[int(key)] = pairs
+    return result
+
+@timed_stage("article")
 def gen_full_article_html(category: str, title: str, meta_desc: str, loop_index: int = 0):
     prompt = f"""
 Rédige un article bien structuré de blog en FRANÇAIS pour Blogger compatible avec l'éditeur de Blogger (HTML uniquement, sans <html> ni <body>).
@@ -971,10 +2211,10 @@ Contexte:
 
 Exigences SEO & mise en forme:
 - Longueur: 800–1200 mots
-- Première ligne EXACTE: <p class='meta'>{meta_desc}</p>
-- Titre H1: <h1>{title}</h1>
-- TOC ancré: <nav id='toc'> avec liens vers CHAQUE H2 (ancres id)
-- Structure: H2 (sections), H3 (sous-sections)
+- Écris UNIQUEMENT le corps de l'article: pas de méta description, pas de <h1>,
+  pas de sommaire (ils sont ajoutés automatiquement). Commence directement par
+  le paragraphe d'introduction.
+- Structure: H2 (sections, sans attribut id), H3 (sous-sections)
 - Laisse une LIGNE BLANCHE entre chaque titre et chaque paragraphe
 - Utilise des listes à puces (ul/li) quand pertinent
 - Mets en valeur les mots importants/clés avec <strong>, <em>, et du monospace <code> pour commandes/extraits
@@ -987,80 +2227,914 @@ Exigences SEO & mise en forme:
 - Français naturel, ton professionnel et pédagogique
 - Vérifie toujour que chaque article respect la structure SEO
 """
-    model = genai.GenerativeModel(MODEL)
-    html = model.generate_content(prompt).text.strip()
-    if html.startswith("```html"):
-        html = html[7:]
-    if html.endswith("```"):
-        html = html[:-3]
-    return html
+    hedger = current_blog().hedger
+    if not STREAM_ARTICLES:
+        html = hedger.run(lambda cancel: generate_text(prompt, usage_kind="article"))
+        METRICS.observe("response_chars", len(html), stage="article")
+        return assemble_article(title, meta_desc, html)
+
+    attempt = 0
+    while True:
+        try:
+            salt = str(attempt)
+            html = hedger.run(lambda cancel: generate_text(prompt, cache_salt=salt,
+                                                           stream_to=ArticleStream(cancel),
+                                                           usage_kind="article"))
+            METRICS.observe("response_chars", len(html), stage="article")
+            return assemble_article(title, meta_desc, html)
+        except ArticleContractError as e:
+            METRICS.count("article_aborts")
+            if attempt >= ARTICLE_RETRIES:
+                raise
+            attempt += 1
+            print(f"[RETRY] Article interrompu pour '{title}': {e}")
 
 # ---------------- CATEGORY PICKING ----------------
-def pick_sequential_categories(history: dict, k: int) -> list:
-    today_key = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    posted_today = set(history.get("days", {}).get(today_key, []))
-    start_idx = history.get("cat_index", 0)
-    chosen = []
-
-    i = 0
-    while len(chosen) < k:
-        idx = (start_idx + i) % len(CATEGORIES)
-        cat = CATEGORIES[idx]
-        if cat not in posted_today:
-            chosen.append(cat)
-        i += 1
-        if i > len(CATEGORIES) * 2:  # safety break
+# Categories are ordered by the day they are next due: the day they were
+# last posted plus their section cadence (never posted = due now). Ties go
+# to the catalog order starting at cat_cursor, which keeps the historical
+# round-robin when every cadence is 0. Categories not due yet are never
+# picked: a run posts fewer articles rather than break a cadence. The DueIndex is built once per
+# history (O(n), one date parse per category) and updated on each post, so
+# picking k categories is O(log n + k), and the result only depends on the
+# history and the catalog.
+def category_cadence(category: str) -> int:
+    entry = current_catalog().by_key.get(category)
+    section = entry["section"] if entry else ""
+    return int(SECTION_CADENCE.get(section, DEFAULT_CADENCE_DAYS))
+
+class DueIndex:
+    """Catalog positions grouped by due day (date ordinal, 0 = never posted)."""
+
+    def __init__(self, catalog: Catalog, last_posted: dict):
+        self.catalog = catalog
+        self.due = {}
+        self.groups = {}
+        for idx, key in enumerate(catalog.keys):
+            due = self._due(key, last_posted.get(key))
+            self.due[key] = due
+            self.groups.setdefault(due, []).append(idx)
+        self.days = sorted(self.groups)
+
+    def _due(self, key: str, last: str) -> int:
+        if not last:
+            return 0
+        return datetime.fromisoformat(last).toordinal() + category_cadence(key)
+
+    def update(self, key: str, last: str):
+        idx = self.catalog.position.get(key)
+        if idx is None:
+            return
+        old, due = self.due[key], self._due(key, last)
+        if due == old:
+            return
+        group = self.groups[old]
+        del group[bisect.bisect_left(group, idx)]
+        if not group:
+            del self.groups[old]
+            del self.days[bisect.bisect_left(self.days, old)]
+        if due not in self.groups:
+            self.groups[due] = []
+            bisect.insort(self.days, due)
+        bisect.insort(self.groups[due], idx)
+        self.due[key] = due
+
+    def pick(self, k: int, start: int, skip, today: int) -> list:
+        # Positions of the first k categories due by `today`, by (due day,
+        # offset from start).
+        chosen = []
+        keys = self.catalog.keys
+        for due in self.days:
+            if due > today:
+                break
+            group = self.groups[due]
+            split = bisect.bisect_left(group, start)
+            for i in range(len(group)):
+                idx = group[(split + i) % len(group)]
+                if keys[idx] in skip:
+                    continue
+                chosen.append(idx)
+                if len(chosen) == k:
+                    return chosen
+        return chosen
+
+def mark_posted(history: dict, category: str, day: str):
+    last = history.setdefault("last_posted", {})
+    last[category] = max(day, last.get(category, ""))
+    index = history.get("_due")
+    if index is not None:
+        index.update(category, last[category])
+
+def pick_categories(history: dict, k: int, exclude=(), today: str = None) -> list:
+    today_key = today or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    skip = set(history.get("days", {}).get(today_key, []))
+    skip.update(exclude)
+    catalog = current_catalog()
+    keys = catalog.keys
+    n = len(keys)
+    # The cursor is the key of the next category, so edits to the catalog
+    # do not move it; cat_index is only the fallback if it was removed.
+    cursor = history.get("cat_cursor")
+    if cursor in catalog.position:
+        start_idx = catalog.position[cursor]
+    else:
+        start_idx = history.get("cat_index", 0) % n
+
+    index = history.get("_due")
+    if index is None or index.catalog is not catalog:
+        index = history["_due"] = DueIndex(catalog, history.get("last_posted", {}))
+    today_ordinal = datetime.fromisoformat(today_key).toordinal()
+    chosen = index.pick(k, start_idx, skip, today_ordinal) if k > 0 else []
+
+    if n:
+        last_offset = max(((idx - start_idx) % n for idx in chosen), default=-1)
+        history["cat_index"] = (start_idx + last_offset + 1) % n
+        history["cat_cursor"] = keys[history["cat_index"]]
+    return [keys[idx] for idx in chosen]
+
+def preview_schedule(history: dict, days: int, per_day: int = None) -> list:
+    # Simulates the next `days` runs on a copy of the scheduling state.
+    if per_day is None:
+        per_day = current_blog().articles_per_day
+    sim = {
+        "days": {},
+        "cat_index": history.get("cat_index", 0),
+        "cat_cursor": history.get("cat_cursor"),
+        "last_posted": dict(history.get("last_posted", {})),
+    }
+    start = datetime.now(timezone.utc)
+    plan = []
+    for offset in range(days):
+        day = (start + timedelta(days=offset)).strftime("%Y-%m-%d")
+        sim["days"] = {day: list(history.get("days", {}).get(day, []))} if offset == 0 else {}
+        chosen = pick_categories(sim, per_day, today=day)
+        for cat in chosen:
+            mark_posted(sim, cat, day)
+        plan.append((day, chosen))
+    return plan
+
+# ---------------- RUN PLANNER ----------------
+# Before generating, the planner decides how many articles and how many
+# title retries fit in what is left of today's token/cost budget and in
+# the run's time budget. Per-call costs are averaged from the recorded
+# token_usage (DEFAULT_CALL_ESTIMATES until there is some). Each article is
+# costed with all of its title retries, so a plan that fits cannot
+# overrun; title retries are reduced first, then the number of articles.
+DEFAULT_CALL_ESTIMATES = {
+    "title": {"prompt": 250, "output": 60, "seconds": 3.0},
+    "title_batch": {"prompt": 600, "output": 400, "seconds": 8.0},
+    "article": {"prompt": 600, "output": 3000, "seconds": 40.0},
+}
+
+def call_estimates(history: dict) -> dict:
+    totals = {}
+    for usage in history.get("token_usage", {}).values():
+        for kind, u in usage.items():
+            row = totals.setdefault(kind, {"calls": 0, "prompt": 0, "output": 0, "seconds": 0.0})
+            for field in row:
+                row[field] += u[field]
+    estimates = {}
+    for kind, default in DEFAULT_CALL_ESTIMATES.items():
+        row = totals.get(kind)
+        if row and row["calls"]:
+            estimates[kind] = {field: row[field] / row["calls"] for field in default}
+        else:
+            estimates[kind] = dict(default)
+    return estimates
+
+def plan_run(history: dict, day: str, wanted: int) -> dict:
+    estimates = call_estimates(history)
+    spent_tokens, spent_cost = usage_totals(history.get("token_usage", {}).get(day, {}))
+    tokens_left = TOKEN_BUDGET_DAILY - spent_tokens if TOKEN_BUDGET_DAILY else None
+    cost_left = COST_BUDGET_DAILY - spent_cost if COST_BUDGET_DAILY else None
+    workers = max(1, MAX_CONCURRENCY)
+
+    def cost(kind: str, calls: float) -> tuple:
+        e = estimates[kind]
+        return (calls * (e["prompt"] + e["output"]), calls * usage_cost(e["prompt"], e["output"]),
+                calls * e["seconds"])
+
+    def fits(n: int, retries: int) -> bool:
+        if n == 0:
+            return True
+        tokens, dollars, seconds = cost("title", n * (1 + retries))
+        parts = [cost("article", n)]
+        if TITLE_CANDIDATES > 1 and TITLE_BATCH:
+            parts.append(cost("title_batch", 1))
+        for t, d, _ in parts:
+            tokens += t
+            dollars += d
+        # Articles run `workers` at a time; the batch call runs first.
+        seconds = -(-n // workers) * (estimates["article"]["seconds"] +
+                                      (1 + retries) * estimates["title"]["seconds"])
+        if len(parts) > 1:
+            seconds += parts[1][2]
+        return ((tokens_left is None or tokens <= tokens_left) and
+                (cost_left is None or dollars <= cost_left) and
+                (not RUN_TIME_BUDGET_S or seconds <= RUN_TIME_BUDGET_S))
+
+    best = (0, 0)
+    for retries in range(MAX_RETRIES_TITLE, -1, -1):
+        n = wanted
+        while n > 0 and not fits(n, retries):
+            n -= 1
+        if n:
+            best = max(best, (n, retries))
+        if n == wanted:
             break
-
-    history["cat_index"] = (start_idx + i) % len(CATEGORIES)
-    return chosen
+    articles, retries = best
+    return {
+        "articles": articles,
+        "title_retries": retries,
+        "tokens_left": tokens_left,
+        "cost_left": cost_left,
+        "degraded": articles < wanted or (articles > 0 and retries < MAX_RETRIES_TITLE),
+    }
+
+def describe_plan(plan: dict, wanted: int) -> str:
+    parts = [f"{plan['articles']}/{wanted} article(s)", f"{plan['title_retries']} relance(s) de titre"]
+    if plan["tokens_left"] is not None:
+        parts.append(f"{max(0, plan['tokens_left'])} tokens restants")
+    if plan["cost_left"] is not None:
+        parts.append(f"{max(0.0, plan['cost_left']):.4f} $ restants")
+    return ", ".join(parts)
+
+# ---------------- OUTBOX ----------------
+# Generated articles are spooled to disk before delivery so that an SMTP
+# failure never throws away a paid Gemini generation. Items move from
+# "pending" to "sent" and are deleted once the history has been saved.
+def outbox_path(item_id: str) -> str:
+    return os.path.join(current_blog().outbox_dir, f"{item_id}.json")
+
+def outbox_write(item: dict):
+    os.makedirs(current_blog().outbox_dir, exist_ok=True)
+    atomic_write_json(outbox_path(item["id"]), item, indent=2)
+
+def outbox_items() -> list:
+    folder = current_blog().outbox_dir
+    if not os.path.isdir(folder):
+        return []
+    items = []
+    for name in os.listdir(folder):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(folder, name), "r", encoding="utf-8") as f:
+                items.append(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Outbox illisible '{name}': {e}")
+    items.sort(key=lambda it: (it.get("day", ""), it.get("created", ""), it["id"]))
+    return items
+
+def outbox_ready(item: dict, day: str) -> bool:
+    return item.get("day", day) <= day
+
+def outbox_remove(item: dict):
+    try:
+        os.remove(outbox_path(item["id"]))
+    except FileNotFoundError:
+        pass
+
+def outbox_item_id(title: str) -> str:
+    return hashlib.sha1(title_key(title).encode("utf-8")).hexdigest()[:16]
+
+def spool_article(category: str, title: str, meta: str, html: str, loop_index: int,
+                  day: str = None) -> dict:
+    item = {
+        "id": outbox_item_id(title),
+        "category": category,
+        "category_name": current_catalog().name(category),
+        "title": title,
+        "meta": meta,
+        "loop_index": loop_index,
+        "html": html,
+        "status": "pending",
+        "attempts": 0,
+        "created": datetime.now(timezone.utc).isoformat(),
+    }
+    if day:
+        item["day"] = day  # pre-generated: not mailed before that day
+    outbox_write(item)
+    return item
+
+def deliver_item(item: dict) -> bool:
+    for attempt in range(DELIVERY_RETRIES + 1):
+        if attempt:
+            time.sleep(DELIVERY_BACKOFF * 2 ** (attempt - 1))
+        item["attempts"] = item.get("attempts", 0) + 1
+        try:
+            mail_post(item["title"], item["html"])
+        except Exception as e:
+            METRICS.count("delivery_retries")
+            print(f"[RETRY] Envoi de '{item['title']}' ({attempt + 1}/{DELIVERY_RETRIES + 1}): "
+                  f"{type(e).__name__}: {e}")
+            continue
+        item["status"] = "sent"
+        outbox_write(item)
+        return True
+    outbox_write(item)
+    return False
+
+def deliver_pending(items: list) -> list:
+    # Mails the items not sent yet; returns the items that are now sent.
+    sent = []
+    for item in items:
+        if item.get("status") != "sent" and not deliver_item(item):
+            print(f"[ERR] Non envoyé, conservé dans l'outbox: {item['title']}")
+            continue
+        sent.append(item)
+    return sent
+
+def record_sent(history: dict, store, day: str, items: list) -> list:
+    done = []
+    for item in items:
+        if title_in_history(item["title"], history):
+            # Delivered and recorded by a previous run that died before cleanup.
+            done.append(item)
+            continue
+        category = current_catalog().resolve(item["category"]) or item["category"]
+        loop_index = history["category_loops"].get(category, 0)
+        store.record_post(history, category, item["title"], loop_index, day)
+        done.append(item)
+        print(f"[OK] Publié: {item['title']} ({current_catalog().name(category)}, loop {loop_index+1})")
+    return done
+
+def drain_outbox(history: dict, store, day: str, items: list = None) -> list:
+    # Delivers every pending item (default: the whole outbox) and records it
+    # in the history. Returns the delivered items; they are removed from disk
+    # by the caller once the history has been saved.
+    return record_sent(history, store, day,
+                       deliver_pending(outbox_items() if items is None else items))
+
+# ---------------- PIPELINE ----------------
+@timed_stage("title_loop")
+def reserve_unique_title(category: str, loop_index: int, recent_titles: list,
+                         history: dict, reserved: NearDupIndex, lock: threading.Lock,
+                         candidates: list = None, max_retries: int = None):
+    # Titles are checked and reserved under the lock so that two categories
+    # running in parallel can never both accept the same title.
+    if candidates is None and TITLE_CANDIDATES > 1:
+        candidates = gen_title_candidates([(category, loop_index, recent_titles)],
+                                          TITLE_CANDIDATES).get(0, [])
+    for title, meta in candidates or ():
+        with lock:
+            if not title_is_taken(title, history, reserved):
+                reserved.add(title)
+                return title, meta
+        METRICS.count("title_candidates_rejected")
+
+    # No usable candidate: fall back to one title per call.
+    if max_retries is None:
+        max_retries = MAX_RETRIES_TITLE
+    tries = 0
+    while True:
+        title, meta = gen_punchy_title_and_meta(category, loop_index, recent_titles, tries)
+        with lock:
+            if not title_is_taken(title, history, reserved):
+                reserved.add(title)
+                return title, meta
+        if tries >= max_retries:
+            METRICS.count("title_skips")
+            return title, None
+        tries += 1
+        METRICS.count("title_retries")
+
+def title_request(category: str, history: dict) -> tuple:
+    return (current_catalog().name(category),
+            history["category_loops"].get(category, 0),
+            history["recent_articles"].get(category, [])[-7:])
+
+def process_category(category: str, history: dict, reserved: NearDupIndex, lock: threading.Lock,
+                     candidates: list = None, title_retries: int = None, leases=None,
+                     day: str = None):
+    name, loop_index, recent_titles = title_request(category, history)
+
+    title, meta = reserve_unique_title(name, loop_index, recent_titles, history, reserved,
+                                       lock, candidates, title_retries)
+    if meta is None:
+        print(f"[SKIP] Titre déjà utilisé pour '{name}': {title}")
+        return None
+
+    html = gen_full_article_html(name, title, meta, loop_index)
+    if leases is not None and not leases.claim(f"item:{outbox_item_id(title)}"):
+        print(f"[SKIP] Article déjà en cours d'envoi par un autre run: {title}")
+        return None
+    return spool_article(category, title, meta, html, loop_index, day)
+
+def record_post(history: dict, category: str, title: str, loop_index: int, day: str):
+    add_title_to_history(title, history)
+    history.setdefault("days", {}).setdefault(day, []).append(category)
+    mark_posted(history, category, day)
+
+    # update loop index
+    history["category_loops"][category] = loop_index + 1
+
+    # update recent_articles
+    history.setdefault("recent_articles", {}).setdefault(category, [])
+    history["recent_articles"][category].append(title)
+    # keep last 7 articles
+    history["recent_articles"][category] = history["recent_articles"][category][-7:]
+
+def run_jobs(jobs: list, workers: int):
+    # Yields (job index, exception or None) in job order. A single worker
+    # runs the jobs in the calling thread; pool threads get a copy of the
+    # caller's context so they serve the same blog.
+    if workers <= 1:
+        for i, job in enumerate(jobs):
+            try:
+                job()
+            except Exception as e:
+                yield i, e
+            else:
+                yield i, None
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, job) for job in jobs]
+        for i, future in enumerate(futures):
+            try:
+                future.result()
+            except Exception as e:
+                yield i, e
+            else:
+                yield i, None
 
 # ---------------- MAIN ----------------
-def main():
-    today_utc = datetime.now(timezone.utc)
-    today_key = today_utc.strftime("%Y-%m-%d")
-
-    history = load_history(HISTORY_FILE)
+def load_run_history(store) -> dict:
+    with METRICS.stage("load_history"):
+        history = store.load()
     history.setdefault("days", {})
     history.setdefault("cat_index", 0)
     history.setdefault("category_loops", {})
     history.setdefault("recent_articles", {})
+    return history
 
-    chosen = pick_sequential_categories(history, ARTICLES_PER_DAY)
-    posted_today = []
-
-    for category in chosen:
-        loop_index = history["category_loops"].get(category, 0)
-        recent_titles = history["recent_articles"].get(category, [])[-7:]
-
-        title, meta = gen_punchy_title_and_meta(category, loop_index, recent_titles)
-        tries = 0
-        while title_in_history(title, history) and tries < MAX_RETRIES_TITLE:
-            tries += 1
-            title, meta = gen_punchy_title_and_meta(category, loop_index, recent_titles)
-        if title_in_history(title, history):
-            print(f"[SKIP] Titre déjà utilisé pour '{category}': {title}")
-            continue
-
-        html = gen_full_article_html(category, title, meta, loop_index)
-        mail_post(title, html)
-        add_title_to_history(title, history)
-        posted_today.append(category)
-
-        # update loop index
-        history["category_loops"][category] = loop_index + 1
+def start_generation(blog: Blog, history: dict, plan: dict):
+    blog.ledger.reset(
+        token_limit=plan["tokens_left"] if plan["tokens_left"] is not None else 0,
+        cost_limit=plan["cost_left"] if plan["cost_left"] is not None else 0.0,
+        deadline=time.monotonic() + RUN_TIME_BUDGET_S if RUN_TIME_BUDGET_S else 0.0)
+    blog.hedger.reset(hedge_delay(history), history.get("call_latencies", {}).get("hedged", []))
+
+def generate_articles(chosen: list, history: dict, reserved: NearDupIndex, plan: dict,
+                      leases: LeaseStore, days: list = None) -> int:
+    # Generates one article per category of `chosen` into the outbox
+    # (scheduled for days[i] when given) and returns how many were spooled.
+    # With TITLE_BATCH, candidates for every category come from one request
+    # and are filtered locally; a category only calls again if none is free.
+    batched = {}
+    if TITLE_CANDIDATES > 1 and TITLE_BATCH and chosen:
+        try:
+            batched = gen_title_candidates([title_request(c, history) for c in chosen],
+                                           TITLE_CANDIDATES)
+        except Exception as e:
+            print(f"[WARN] Génération groupée des titres échouée: {type(e).__name__}: {e}")
+
+    lock = threading.Lock()
+    spooled = []
+    jobs = [functools.partial(process_category, category, history, reserved, lock,
+                              batched.get(i), plan["title_retries"], leases,
+                              days[i] if days else None)
+            for i, category in enumerate(chosen)]
+    workers = 1 if PROFILER is not None else MAX_CONCURRENCY
+    for i, error in run_jobs([lambda job=job: spooled.append(job()) for job in jobs], workers):
+        if error is not None:
+            METRICS.count("category_failures")
+            print(f"[ERR] Échec pour '{current_catalog().name(chosen[i])}': {type(error).__name__}: {error}")
+    return sum(1 for item in spooled if item is not None)
+
+def save_usage(store, blog: Blog, day: str) -> dict:
+    with history_lock(blog.history_file):
+        history = load_run_history(store)
+        if blog.ledger.usage:
+            store.record_usage(history, day, blog.ledger.usage, blog.ledger.latencies)
+        with METRICS.stage("save_history"):
+            store.save(history)
+    return history
 
-        # update recent_articles
-        history.setdefault("recent_articles", {})
-        history.setdefault("recent_articles", {}).setdefault(category, [])
-        history["recent_articles"][category].append(title)
-        # keep last 7 articles
-        history["recent_articles"][category] = history["recent_articles"][category][-7:]
+def run_blog():
+    blog = current_blog()
+    today_utc = datetime.now(timezone.utc)
+    today_key = today_utc.strftime("%Y-%m-%d")
 
-        print(f"[OK] Publié: {title} ({category}, loop {loop_index+1})")
+    store = acquire_history_store()
+    leases = LeaseStore(lease_path(blog.history_file))
+    try:
+        # Categories are picked and claimed under the history lock, and the
+        # advanced cursor is saved before generating, so an overlapping run
+        # starts after them instead of on the same ones.
+        with history_lock(blog.history_file):
+            history = load_run_history(store)
+
+            # Ready outbox items (left by an earlier run, or pre-generated for
+            # today or before) take today's first slots and are mailed as-is;
+            # those claimed by a run still alive are left to it. Items
+            # scheduled for later days keep their categories and titles.
+            items = outbox_items()
+            outbox = [it for it in items if it.get("status") != "sent"]
+            spooled = [it for it in items
+                       if outbox_ready(it, today_key) and leases.claim(f"item:{it['id']}")]
+            pending = [it for it in spooled if it.get("status") != "sent"]
+            reserved = NearDupIndex()
+            for it in outbox:
+                reserved.add(it["title"])
+            wanted = max(0, blog.articles_per_day - len(pending))
+            plan = plan_run(history, today_key, wanted)
+            if plan["degraded"]:
+                print(f"[PLAN] Budget limité: {describe_plan(plan, wanted)}")
+            exclude = {current_catalog().resolve(it["category"]) or it["category"] for it in outbox}
+            exclude.update(leases.held_by_others("cat:"))
+            chosen = [cat for cat in pick_categories(history, plan["articles"], exclude=exclude)
+                      if leases.claim(f"cat:{cat}")]
+            with METRICS.stage("save_history"):
+                store.save(history)
+
+        # Categories are generated concurrently into the outbox; delivery then
+        # mails the items this run holds and records them from this thread.
+        start_generation(blog, history, plan)
+        generate_articles(chosen, history, reserved, plan, leases)
+        sent = deliver_pending([it for it in outbox_items() if leases.owns(f"item:{it['id']}")])
+
+        # Reloaded under the lock: other runs may have posted meanwhile.
+        with history_lock(blog.history_file):
+            history = load_run_history(store)
+            delivered = record_sent(history, store, today_key, sent)
+            if blog.ledger.usage:
+                store.record_usage(history, today_key, blog.ledger.usage, blog.ledger.latencies)
+            with METRICS.stage("save_history"):
+                store.save(history)
+        METRICS.count("articles_published", len(delivered))
+        for item in delivered:
+            outbox_remove(item)
+    except BaseException:
+        release_history_store(store, failed=True)
+        raise
+    else:
+        release_history_store(store)
+    finally:
+        leases.close()
+    print(f"[TOKENS] {blog.name + ': ' if blog.name else ''}{blog.ledger.summary()}")
+
+def pregenerate(days: int):
+    # Walks `days` days ahead in the schedule (today included) and spools
+    # their articles, each scheduled for its day, so that `run` only has to
+    # mail them. Days already covered by the backlog are only topped up.
+    blog = current_blog()
+    today_utc = datetime.now(timezone.utc)
+    today_key = today_utc.strftime("%Y-%m-%d")
 
-    history["days"][today_key] = posted_today
-    save_history(HISTORY_FILE, history)
+    store = acquire_history_store()
+    leases = LeaseStore(lease_path(blog.history_file))
+    try:
+        with history_lock(blog.history_file):
+            history = load_run_history(store)
+            backlog = [it for it in outbox_items() if it.get("status") != "sent"]
+            scheduled = {}
+            reserved = NearDupIndex()
+            for it in backlog:
+                day = max(it.get("day", today_key), today_key)
+                scheduled[day] = scheduled.get(day, 0) + 1
+                reserved.add(it["title"])
+            slots = []
+            for offset in range(days):
+                day = (today_utc + timedelta(days=offset)).strftime("%Y-%m-%d")
+                free = blog.articles_per_day - scheduled.get(day, 0)
+                free -= len(history["days"].get(day, []))
+                slots.extend([day] * max(0, free))
+            plan = plan_run(history, today_key, len(slots))
+            if plan["degraded"]:
+                print(f"[PLAN] Budget limité: {describe_plan(plan, len(slots))}")
+            slots = slots[:plan["articles"]]
+
+            # Same walk as preview_schedule, but the cursor it reaches is
+            # saved so the daily runs continue after the backlog.
+            exclude = {current_catalog().resolve(it["category"]) or it["category"] for it in backlog}
+            exclude.update(leases.held_by_others("cat:"))
+            sim = {
+                "cat_index": history.get("cat_index", 0),
+                "cat_cursor": history.get("cat_cursor"),
+                "last_posted": dict(history.get("last_posted", {})),
+            }
+            chosen, chosen_days = [], []
+            for day in sorted(set(slots)):
+                sim["days"] = {day: list(history["days"].get(day, []))}
+                for cat in pick_categories(sim, slots.count(day), exclude=exclude, today=day):
+                    mark_posted(sim, cat, day)
+                    exclude.add(cat)
+                    if leases.claim(f"cat:{cat}"):
+                        chosen.append(cat)
+                        chosen_days.append(day)
+            history["cat_index"] = sim["cat_index"]
+            history["cat_cursor"] = sim["cat_cursor"]
+            with METRICS.stage("save_history"):
+                store.save(history)
+
+        start_generation(blog, history, plan)
+        made = generate_articles(chosen, history, reserved, plan, leases, chosen_days)
+        save_usage(store, blog, today_key)
+    except BaseException:
+        release_history_store(store, failed=True)
+        raise
+    else:
+        release_history_store(store)
+    finally:
+        leases.close()
+    METRICS.count("articles_pregenerated", made)
+    print(f"[BACKLOG] {blog.name + ': ' if blog.name else ''}{made} article(s) générés, "
+          f"{len(backlog) + made} en attente")
+
+def serve_blogs(blogs: list, task, *args):
+    # Runs task(*args) for each of `blogs` concurrently (default: the blog
+    # set by the environment), then prints the run's metrics.
+    METRICS.reset()
+    if not blogs:
+        task(*args)
+    else:
+        jobs = [functools.partial(in_blog, blog, task, *args) for blog in blogs]
+        workers = 1 if PROFILER is not None else len(blogs)
+        for i, error in run_jobs(jobs, workers):
+            if error is not None:
+                METRICS.count("blog_failures")
+                print(f"[ERR] Échec du blog '{blogs[i].name}': {type(error).__name__}: {error}")
+    for line in METRICS.summary_lines():
+        print(f"[METRICS] {line}")
+    METRICS.export()
+    if SMTP_POOL is not None:
+        print(f"[SMTP] {SMTP_POOL.latency_summary()}")
+    if GEMINI_RESPONSE_CACHE is not None:
+        print(f"[CACHE] {GEMINI_RESPONSE_CACHE.summary()}")
+
+def main(blogs: list = None):
+    serve_blogs(blogs, run_blog)
+
+# ---------------- DAEMON ----------------
+# `daemon` serves DAEMON_SCHEDULE from one long-lived process instead of a
+# cold start per run: the SDK, the model client, the SMTP pool, the model
+# limiter's state and each blog's history store stay in memory between
+# tasks. The history is still reloaded under the lock whenever its files
+# changed, so manual runs next to the daemon stay safe. The blogs file and
+# the catalogs are reloaded when they change on disk. SIGTERM or SIGINT
+# stops the daemon once the current task is over (a second one aborts it).
+DAEMON_TASKS = {"run": 0, "pregenerate": 1}
+
+def parse_schedule(text: str) -> list:
+    # "02:00 pregenerate 7; 08:00 run" -> [(2, 0, "pregenerate", [7]), (8, 0, "run", [])]
+    slots = []
+    for entry in text.split(";"):
+        parts = entry.split()
+        if not parts:
+            continue
+        m = re.fullmatch(r"(\d{1,2}):(\d{2})", parts[0])
+        task = parts[1] if len(parts) > 1 else "run"
+        args = parts[2:]
+        if (not m or int(m.group(1)) > 23 or int(m.group(2)) > 59 or task not in DAEMON_TASKS
+                or len(args) > DAEMON_TASKS[task] or not all(a.isdigit() for a in args)):
+            raise ValueError(f"créneau invalide: {entry.strip()!r}")
+        slots.append((int(m.group(1)), int(m.group(2)), task, [int(a) for a in args]))
+    if not slots:
+        raise ValueError("DAEMON_SCHEDULE vide")
+    return slots
+
+def next_slot(slots: list, now: datetime) -> tuple:
+    best = None
+    for hour, minute, task, args in slots:
+        when = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if when <= now:
+            when += timedelta(days=1)
+        if best is None or when < best[0]:
+            best = (when, task, args)
+    return best
+
+class Daemon:
+    """Runs the scheduled tasks, reloading the configuration when it changes."""
+
+    def __init__(self, slots: list, blogs_path: str = ""):
+        self.slots = slots
+        self.blogs_path = blogs_path
+        self.blogs = None
+        self.config = None
+        self.stop = threading.Event()
+
+    def _config_signature(self) -> tuple:
+        paths = [self.blogs_path] if self.blogs_path else []
+        paths += sorted({blog.catalog_file for blog in self.blogs or [DEFAULT_BLOG]})
+        sig = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+                sig.append((path, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                sig.append((path, None))
+        return tuple(sig)
+
+    def reload(self):
+        # (Re)loads the catalog and the blogs if their files changed, and
+        # opens a warm history store per blog.
+        global CATALOG
+        if self.config is not None and self._config_signature() == self.config:
+            return
+        previous = CATALOG
+        try:
+            CATALOG = load_catalog()
+            blogs = load_blogs(self.blogs_path) if self.blogs_path else None
+        except (OSError, ValueError) as e:
+            CATALOG = previous
+            if self.config is None:
+                raise
+            print(f"[WARN] Configuration modifiée mais illisible, ancienne conservée: {e}")
+            return
+        reloaded = self.config is not None
+        self.close_stores()
+        self.blogs = blogs
+        for blog in blogs or [DEFAULT_BLOG]:
+            blog.warm_store = in_blog(blog, open_history_store, keep_loaded=True)
+        self.config = self._config_signature()
+        if reloaded:
+            print(f"[DAEMON] Configuration rechargée: {len(blogs or [DEFAULT_BLOG])} blog(s), "
+                  f"{len(CATALOG)} catégories")
+
+    def close_stores(self):
+        for blog in self.blogs or [DEFAULT_BLOG]:
+            if blog.warm_store is not None:
+                blog.warm_store.close()
+                blog.warm_store = None
+
+    def run_task(self, task: str, args: list):
+        self.reload()
+        print(f"[DAEMON] {task} {' '.join(map(str, args))}".rstrip())
+        try:
+            if task == "run":
+                main(self.blogs)
+            else:
+                serve_blogs(self.blogs, pregenerate, *(args or [7]))
+        except Exception as e:
+            print(f"[ERR] Tâche {task} échouée: {type(e).__name__}: {e}")
+        finally:
+            # Idle SMTP sessions would be dropped by the server before the
+            # next slot anyway; they reconnect on their next send.
+            if SMTP_POOL is not None:
+                SMTP_POOL.disconnect()
+
+    def request_stop(self, signum, frame):
+        if self.stop.is_set():
+            raise KeyboardInterrupt
+        print(f"[DAEMON] Signal {signum} reçu: arrêt après la tâche en cours")
+        self.stop.set()
+
+    def serve(self):
+        import signal
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+        self.reload()
+        get_model()
+        try:
+            while not self.stop.is_set():
+                when, task, args = next_slot(self.slots, datetime.now(timezone.utc))
+                print(f"[DAEMON] Prochaine tâche: {task} le {when:%Y-%m-%d %H:%M} UTC")
+                # Short waits follow wall-clock jumps (suspend, NTP).
+                while not self.stop.is_set():
+                    left = (when - datetime.now(timezone.utc)).total_seconds()
+                    if left <= 0 or self.stop.wait(min(left, 60)):
+                        break
+                if not self.stop.is_set():
+                    self.run_task(task, args)
+        finally:
+            self.close_stores()
+            if SMTP_POOL is not None:
+                SMTP_POOL.close()
+            print("[DAEMON] Arrêté")
+
+# ---------------- CLI ----------------
+def print_preview(days: int):
+    store = open_history_reader()
+    history = store.load()
+    store.close()
+    for day, chosen in preview_schedule(history, days):
+        print(day)
+        for cat in chosen:
+            print(f"  [{cat}] {current_catalog().name(cat)}")
+
+def dry_run():
+    # What `run` would do today, without Gemini, SMTP or history writes.
+    store = open_history_reader()
+    history = store.load()
+    store.close()
+    today_key = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    catalog = current_catalog()
+    outbox = [it for it in outbox_items() if it.get("status") != "sent"]
+    spooled = [it for it in outbox if outbox_ready(it, today_key)]
+    for it in spooled:
+        print(f"[OUTBOX] {it['title']} ({catalog.name(catalog.resolve(it['category']) or it['category'])})")
+    wanted = max(0, current_blog().articles_per_day - len(spooled))
+    plan = plan_run(history, today_key, wanted)
+    print(f"[PLAN] {describe_plan(plan, wanted)}")
+    chosen = pick_categories(history, plan["articles"],
+                             exclude={catalog.resolve(it["category"]) or it["category"]
+                                      for it in outbox})
+    for cat in chosen:
+        print(f"[DRY] {current_catalog().name(cat)} (loop {history['category_loops'].get(cat, 0) + 1})")
+
+def print_stats():
+    store = open_history_reader()
+    history = store.load()
+    known_titles = len(history.get("titles", ()))
+    store.close()
+    days = history.get("days", {})
+    loops = history.get("category_loops", {})
+    print(f"Catalogue: {len(current_catalog())} catégories")
+    print(f"Titres connus: {known_titles}")
+    print(f"Catégories déjà publiées: {sum(1 for n in loops.values() if n)}")
+    print(f"Articles publiés (jours conservés): {sum(len(c) for c in days.values())}")
+    for day in sorted(days)[-7:]:
+        print(f"  {day}: {len(days[day])}")
+    items = outbox_items()
+    print(f"Outbox: {len(items)} article(s)")
+    scheduled = {}
+    for it in items:
+        if "day" in it:
+            scheduled[it["day"]] = scheduled.get(it["day"], 0) + 1
+    for day in sorted(scheduled):
+        print(f"  prévus {day}: {scheduled[day]}")
+    for day, usage in sorted(history.get("token_usage", {}).items())[-7:]:
+        tokens, cost = usage_totals(usage)
+        print(f"  tokens {day}: {tokens} ({cost:.4f} $)")
+    print(f"Prochaine catégorie: {current_catalog().name(history.get('cat_cursor') or '')}")
+
+def for_each_blog(blogs: list, func, *args):
+    if not blogs:
+        return func(*args)
+    for blog in blogs:
+        print(f"== {blog.name} ==")
+        in_blog(blog, func, *args)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Daily Blogger feeder")
+    parser.add_argument("--timing", action="store_true",
+                        help="affiche le temps de démarrage et la durée de la commande")
+    parser.add_argument("--profile", nargs="?", const=".data/profile", metavar="DIR",
+                        help="cProfile + tracemalloc par étape, rapports dans DIR")
+    parser.add_argument("--blogs", default=BLOGS_FILE, metavar="FILE",
+                        help="fichier JSON des blogs à servir (défaut: BLOGS_FILE)")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("run", help="génère et publie les articles du jour (défaut)")
+    pregen = sub.add_parser("pregenerate", help="génère à l'avance les articles des N prochains jours")
+    pregen.add_argument("days", type=int, nargs="?", default=7)
+    sub.add_parser("daemon", help="reste actif et lance les tâches de DAEMON_SCHEDULE (UTC)")
+    sub.add_parser("dry-run", help="affiche ce que run ferait, sans Gemini ni SMTP")
+    sub.add_parser("stats", help="statistiques de l'historique")
+    preview = sub.add_parser("preview", help="catégories des prochains jours")
+    preview.add_argument("days", type=int, nargs="?", default=7)
+    return parser
+
+def cli(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.timing:
+        print(f"[TIME] Démarrage: {(time.perf_counter() - _STARTED) * 1000:.1f} ms")
+    global PROFILER
+    started = time.perf_counter()
+    command = args.command or "run"
+    try:
+        blogs = load_blogs(args.blogs) if args.blogs else None
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"[ERR] Configuration des blogs: {e}")
+    if command == "daemon":
+        try:
+            slots = parse_schedule(DAEMON_SCHEDULE)
+        except ValueError as e:
+            raise SystemExit(f"[ERR] DAEMON_SCHEDULE: {e}")
+    try:
+        if command == "run" or (command == "daemon" and any(s[2] == "run" for s in slots)):
+            for name in SECRET_VARS:
+                require_env(name)
+            for blog in blogs or [DEFAULT_BLOG]:
+                _ = blog.mail  # raises if the blog's address is not set
+        elif command in ("pregenerate", "daemon"):
+            require_env("GEMINI_API_KEY")
+    except RuntimeError as e:
+        raise SystemExit(f"[ERR] {e}")
+    if args.profile:
+        PROFILER = RunProfiler(args.profile)
+        PROFILER.start()
+    try:
+        if command == "run":
+            main(blogs)
+        elif command == "pregenerate":
+            serve_blogs(blogs, pregenerate, args.days)
+        elif command == "daemon":
+            Daemon(slots, args.blogs).serve()
+        elif command == "dry-run":
+            for_each_blog(blogs, dry_run)
+        elif command == "stats":
+            for_each_blog(blogs, print_stats)
+        elif command == "preview":
+            for_each_blog(blogs, print_preview, args.days)
+    finally:
+        if PROFILER is not None:
+            stats_path, report_path = PROFILER.stop()
+            PROFILER = None
+            print(f"[PROFILE] {stats_path}")
+            print(f"[PROFILE] {report_path}")
+    if args.timing:
+        print(f"[TIME] {command}: {(time.perf_counter() - started) * 1000:.1f} ms")
 
 if __name__ == "__main__":
-    main()
+    cli()